@@ -281,7 +281,8 @@ class SelectRootNode(html5.Select):
 	def update(self):
 		self.removeAllChildren()
 		NetworkService.request(self.parent().parent().module, "listRootNodes",
-		                        successHandler=self.onRootNodesAvailable)
+		                        successHandler=self.onRootNodesAvailable,
+		                        priority=NetworkService.PRIORITY_BACKGROUND)
 
 	def onRootNodeChanged(self, newNode):
 		for option in self._children:
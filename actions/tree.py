@@ -292,7 +292,7 @@ class SelectRootNode(html5.Select):
 		self.removeAllChildren()
 		NetworkService.request(self.parent().parent().module, "listRootNodes",
 		                       successHandler=self.onRootNodesAvailable,
-		                       cacheable=True)
+		                       cacheable=True, priority=NetworkService.PRIORITY_BACKGROUND)
 
 	def onRootNodeChanged(self, newNode):
 		for option in self._children:
@@ -1,9 +1,27 @@
 # -*- coding: utf-8 -*-
-import html5
+import html5, utils
 
 from priorityqueue import editBoneSelector, viewDelegateSelector, extractorDelegateSelector
 from config import conf
 
+def allowHtmlRender(cls):
+	"""
+		Lets tables render the cells of view delegate class cls by its renderHtml() method,
+		instead of building widgets by render(). Subclasses are not included, as they may
+		override render() or the methods it uses; they must be allowed on their own.
+	"""
+	cls.htmlRenderClass = cls
+
+def getOptions(options, skelStructure, field):
+	"""
+		Returns the values of the select bone 'field' as dict. The dict is built only
+		once and kept in options, a dict held by the caller.
+	"""
+	if not field in options:
+		options[field] = {k: v for k, v in skelStructure[field]["values"]}
+
+	return options[field]
+
 class BaseBoneExtractor(object):
 	"""
 		Base "Catch-All" extractor for everything not handled separately.
@@ -45,6 +63,15 @@ class BaseViewBoneDelegate( object ):
 
 		return html5.Label(conf[ "empty_value" ])
 
+	def renderHtml(self, data, field):
+		"""
+			Like render(), but returns the cell as HTML string.
+		"""
+		if field in data.keys():
+			return "<label>%s</label>" % utils.escapeHtml(data[field])
+
+		return "<label>%s</label>" % utils.escapeHtml(conf[ "empty_value" ])
+
 
 class BaseEditBone(html5.Input):
 	"""
@@ -82,4 +109,5 @@ class BaseEditBone(html5.Input):
 # Register this Bone in the global queue as generic fallback.
 editBoneSelector.insert(0, lambda *args, **kwargs: True, BaseEditBone)
 viewDelegateSelector.insert(0, lambda *args, **kwargs: True, BaseViewBoneDelegate)
+allowHtmlRender(BaseViewBoneDelegate)
 extractorDelegateSelector.insert(0, lambda *args, **kwargs: True, BaseBoneExtractor)
@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
-import html5
+import html5, utils
 from priorityqueue import editBoneSelector, viewDelegateSelector, extendedSearchWidgetSelector
 from config import conf
 from event import EventDispatcher
 from i18n import translate
+from bones.base import allowHtmlRender
 
 class BooleanViewBoneDelegate( object ):
 	def __init__(self, moduleName, boneName, skelStructure, *args, **kwargs ):
@@ -17,6 +18,14 @@ class BooleanViewBoneDelegate( object ):
 			return html5.Label(translate(str(data[field])))
 		return html5.Label(conf["empty_value"])
 
+	def renderHtml(self, data, field):
+		"""
+			Like render(), but returns the cell as HTML string.
+		"""
+		if field in data.keys():
+			return "<label>%s</label>" % utils.escapeHtml(translate(str(data[field])))
+		return "<label>%s</label>" % utils.escapeHtml(conf["empty_value"])
+
 class BooleanEditBone( html5.Input ):
 
 	def __init__(self, moduleName, boneName,readOnly, *args, **kwargs ):
@@ -94,4 +103,5 @@ def CheckForBooleanBone(moduleName, boneName, skelStucture, *args, **kwargs):
 #Register this Bone in the global queue
 editBoneSelector.insert( 3, CheckForBooleanBone, BooleanEditBone)
 viewDelegateSelector.insert( 3, CheckForBooleanBone, BooleanViewBoneDelegate)
+allowHtmlRender(BooleanViewBoneDelegate)
 extendedSearchWidgetSelector.insert( 1, ExtendedBooleanSearch.canHandleExtension, ExtendedBooleanSearch )
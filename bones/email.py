@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
-import html5
+import html5, utils
 from priorityqueue import editBoneSelector, viewDelegateSelector
 import bones.string as strBone
+from bones.base import allowHtmlRender
 from widgets.edit import InvalidBoneValueException
 import re
 
@@ -27,6 +28,19 @@ class EmailViewBoneDelegate( strBone.StringViewBoneDelegate ):
 			aa["title"]="open mailclient"+str(datafield)
 		return(aa)
 
+	def getViewHtml(self, labelstr, datafield):
+		if ("params" in self.skelStructure[self.boneName].keys()
+			and isinstance(self.skelStructure[self.boneName]["params"], dict)
+			and self.skelStructure[self.boneName]["params"].get("renderAsString")):
+			return super(EmailViewBoneDelegate, self).getViewHtml(labelstr, datafield)
+
+		title = "open mailclient"
+		if datafield:
+			title += str(datafield)
+
+		return "<a href=\"mailto:%s\" target=\"_Blank\" title=\"%s\">%s</a>" % (
+			utils.escapeHtml(labelstr), utils.escapeHtml(title), utils.escapeHtml(labelstr))
+
 class EmailEditBone( strBone.StringEditBone ):
 	def __init__(self, moduleName, boneName,readOnly,*args, **kwargs ):
 		super( EmailEditBone,  self ).__init__( moduleName, boneName,readOnly, *args, **kwargs )
@@ -58,3 +72,4 @@ def CheckForEmailBone(  moduleName, boneName, skelStucture, *args, **kwargs ):
 #Register this Bone in the global queue
 editBoneSelector.insert( 4, CheckForEmailBone, EmailEditBone)
 viewDelegateSelector.insert( 4, CheckForEmailBone, EmailViewBoneDelegate)
+allowHtmlRender(EmailViewBoneDelegate)
@@ -123,7 +123,7 @@ class FileMultiSelectionBoneEntry(RelationalMultiSelectionBoneEntry):
 	def fetchEntry(self, key):
 		NetworkService.request(self.module, "view/leaf/" + key,
 		                        successHandler=self.onSelectionDataAvailable,
-		                        cacheable=True)
+		                        cacheable=True, priority=NetworkService.PRIORITY_PREFETCH)
 
 	def onSelectionDataAvailable(self, req):
 		data = NetworkService.decode(req)
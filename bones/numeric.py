@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
-import html5
+import html5, utils
 from priorityqueue import editBoneSelector, viewDelegateSelector, extendedSearchWidgetSelector, extractorDelegateSelector
 from event import EventDispatcher
 from config import conf
-from bones.base import BaseBoneExtractor
+from bones.base import BaseBoneExtractor, allowHtmlRender
 
 class NumericBoneExtractor(BaseBoneExtractor):
 
@@ -31,6 +31,15 @@ class NumericViewBoneDelegate(object):
 		self.moduleName = moduleName
 
 	def render(self, data, field):
+		return html5.Label(self.getViewText(data, field))
+
+	def renderHtml(self, data, field):
+		"""
+			Like render(), but returns the cell as HTML string.
+		"""
+		return "<label>%s</label>" % utils.escapeHtml(self.getViewText(data, field))
+
+	def getViewText(self, data, field):
 		s =  conf["empty_value"]
 		if field in data.keys():
 			try:
@@ -44,7 +53,7 @@ class NumericViewBoneDelegate(object):
 			except:
 				s = str(data[field])
 
-		return html5.Label(s)
+		return s
 
 class NumericEditBone(html5.Span):
 	def __init__(self, moduleName, boneName, readOnly, _min=False, _max=False, precision=False, currency=None,
@@ -175,5 +184,6 @@ def CheckForNumericBone(moduleName, boneName, skelStucture, *args, **kwargs):
 #Register this Bone in the global queue
 editBoneSelector.insert( 3, CheckForNumericBone, NumericEditBone)
 viewDelegateSelector.insert( 3, CheckForNumericBone, NumericViewBoneDelegate)
+allowHtmlRender(NumericViewBoneDelegate)
 extendedSearchWidgetSelector.insert( 1, ExtendedNumericSearch.canHandleExtension, ExtendedNumericSearch )
 extractorDelegateSelector.insert( 3, CheckForNumericBone, NumericBoneExtractor)
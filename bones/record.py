@@ -16,6 +16,9 @@ class RecordBoneExtractor(BaseBoneExtractor):
 		if "format" in skelStructure[boneName]:
 			self.format = skelStructure[boneName]["format"]
 
+		# Structure as dict, so formatString() doesn't convert it for each entry
+		self.using = utils.structureToDict(skelStructure[boneName].get("using"))
+
 	def render(self, data, field):
 		assert field == self.boneName, "render() was called with field %s, expected %s" % (field, self.boneName)
 
@@ -23,13 +26,11 @@ class RecordBoneExtractor(BaseBoneExtractor):
 		if not field:
 			return ""
 
-		structure = self.skelStructure[self.boneName]
-
 		try:
 			if not isinstance(val, list):
 				val = [val or ""]
 
-			val = ", ".join([utils.formatString(self.format, x, structure["using"], language=conf["currentlanguage"])
+			val = ", ".join([utils.formatString(self.format, x, self.using, language=conf["currentlanguage"])
 			                 for x in val])
 		except:
 			# We probably received some garbage
@@ -46,13 +47,11 @@ class RecordBoneExtractor(BaseBoneExtractor):
 		if not val:
 			return None
 
-		structure = self.skelStructure[self.boneName]
-
 		try:
 			if not isinstance(val, list):
 				val = [val]
 
-			val = ", ".join([utils.formatString(self.format, x, structure["using"], language=conf["currentlanguage"])
+			val = ", ".join([utils.formatString(self.format, x, self.using, language=conf["currentlanguage"])
 			                 for x in val])
 		except:
 			# We probably received some garbage
@@ -74,6 +73,9 @@ class RecordViewBoneDelegate(object):
 		if "format" in structure[boneName]:
 			self.format = structure[boneName]["format"]
 
+		# Structure as dict, so formatString() doesn't convert it for each entry
+		self.using = utils.structureToDict(structure[boneName].get("using"))
+
 	def render(self, data, field):
 		assert field == self.boneName, "render() was called with field %s, expected %s" % (field, self.boneName)
 		val = data.get(field)
@@ -84,8 +86,6 @@ class RecordViewBoneDelegate(object):
 			lbl.appendChild(conf["empty_value"])
 			return lbl
 
-		structure = self.structure[self.boneName]
-
 		try:
 			if not isinstance(val, list):
 				val = [val]
@@ -95,7 +95,7 @@ class RecordViewBoneDelegate(object):
 				if conf["maxMultiBoneEntries"] and count >= conf["maxMultiBoneEntries"]:
 					val = val[:conf["maxMultiBoneEntries"] - 1]
 
-			res = "\n".join([utils.formatString(self.format, x, structure["using"], language=conf["currentlanguage"])
+			res = "\n".join([utils.formatString(self.format, x, self.using, language=conf["currentlanguage"])
 			                 for x in val])
 
 			if conf["maxMultiBoneEntries"] and count >= conf["maxMultiBoneEntries"]:
@@ -30,6 +30,10 @@ class RelationalBoneExtractor(BaseBoneExtractor):
 		if "format" in skelStructure[boneName].keys():
 			self.format = skelStructure[boneName]["format"]
 
+		# Structures as dicts, so formatString() doesn't convert them for each entry
+		self.relskel = utils.structureToDict(skelStructure[boneName].get("relskel"))
+		self.using = utils.structureToDict(skelStructure[boneName].get("using"))
+
 	def render(self, data, field ):
 		assert field == self.boneName, "render() was called with field %s, expected %s" % (field, self.boneName)
 
@@ -37,16 +41,14 @@ class RelationalBoneExtractor(BaseBoneExtractor):
 		if not field:
 			return ""
 
-		structure = self.skelStructure[self.boneName]
-
 		try:
 			if not isinstance(val, list):
 				val = [val or ""]
 
 			val = ", ".join([(utils.formatString(
-								utils.formatString(self.format, x["dest"], structure["relskel"],
+								utils.formatString(self.format, x["dest"], self.relskel,
 								                    prefix=["dest"], language=conf["currentlanguage"]),
-									x["rel"], structure["using"],
+									x["rel"], self.using,
 										prefix=["rel"], language=conf["currentlanguage"])
 			                    or x["key"]) for x in val])
 		except:
@@ -64,16 +66,14 @@ class RelationalBoneExtractor(BaseBoneExtractor):
 		if not val:
 			return None
 
-		structure = self.skelStructure[self.boneName]
-
 		try:
 			if not isinstance(val, list):
 				val = [val]
 
 			val = [(utils.formatString(
-								utils.formatString(self.format, x["dest"], structure["relskel"],
+								utils.formatString(self.format, x["dest"], self.relskel,
 								                    prefix=["dest"], language=conf["currentlanguage"]),
-									x["rel"], structure["using"],
+									x["rel"], self.using,
 										prefix=["rel"], language=conf["currentlanguage"])
 			                    or x["key"]) for x in val]
 		except:
@@ -97,6 +97,10 @@ class RelationalViewBoneDelegate(object):
 		self.structure = structure
 		self.boneName = boneName
 
+		# Structures as dicts, so formatString() doesn't convert them for each entry
+		self.relskel = utils.structureToDict(structure[boneName].get("relskel"))
+		self.using = utils.structureToDict(structure[boneName].get("using"))
+
 	def render(self, data, field):
 		assert field == self.boneName, "render() was called with field %s, expected %s" % (field, self.boneName)
 		val = data.get(field)
@@ -107,8 +111,6 @@ class RelationalViewBoneDelegate(object):
 			lbl.appendChild(conf["empty_value"])
 			return lbl
 
-		structure = self.structure[self.boneName]
-
 		try:
 			if not isinstance(val, list):
 				val = [val]
@@ -118,18 +120,18 @@ class RelationalViewBoneDelegate(object):
 				if conf["maxMultiBoneEntries"] and count > conf["maxMultiBoneEntries"]:
 					val = val[:conf["maxMultiBoneEntries"]]
 
-			if structure["using"]:
+			if self.using:
 				res = "\n".join([(utils.formatString(
-									utils.formatString(self.format, x["dest"], structure["relskel"],
+									utils.formatString(self.format, x["dest"], self.relskel,
 									                    prefix=["dest"], language=conf["currentlanguage"]),
-										x["rel"], structure["using"],
+										x["rel"], self.using,
 											prefix=["rel"], language=conf["currentlanguage"])
 				                  or x["key"]) for x in val])
 			else:
 				res = "\n".join([(utils.formatString(
-									utils.formatString(self.format, x["dest"], structure["relskel"],
+									utils.formatString(self.format, x["dest"], self.relskel,
 									                    prefix=["dest"], language=conf["currentlanguage"]),
-														x["dest"], structure["relskel"],
+														x["dest"], self.relskel,
 															language=conf["currentlanguage"])
 				                  or x["key"]) for x in val])
 
@@ -151,6 +153,7 @@ class RelationalSingleSelectionBone(html5.Div):
 	"""
 		Provides the widget for a relationalBone with multiple=False
 	"""
+	acceptsChangeDetails = True # onDataChanged also takes the keys of merged changes
 
 	def __init__(self, srcModule, boneName, readOnly, destModule, format="$(dest.name)", required=False,
 	                using = None, usingDescr = None, context = None, *args, **kwargs ):
@@ -452,14 +455,15 @@ class RelationalSingleSelectionBone(html5.Div):
 
 	def onAttach(self):
 		super(RelationalSingleSelectionBone, self).onAttach()
-		NetworkService.registerChangeListener(self)
+		NetworkService.registerChangeListener(self, module=self.destModule)
 
 	def onDetach(self):
 		NetworkService.removeChangeListener(self)
 		super(RelationalSingleSelectionBone, self).onDetach()
 
-	def onDataChanged(self, module, key = None, **kwargs):
-		if module == self.destModule and self.selection and key == self.selection["dest"]["key"]:
+	def onDataChanged(self, module, key = None, keys = None, **kwargs):
+		if (module == self.destModule and self.selection
+			and (key == self.selection["dest"]["key"] or (keys and self.selection["dest"]["key"] in keys))):
 			self.setSelection(self.selection)
 
 	def onSelectionDataAvailable(self, req):
@@ -490,6 +494,7 @@ class RelationalMultiSelectionBoneEntry(html5.Div):
 		Wrapper-class that holds one referenced entry in a RelationalMultiSelectionBone.
 		Provides the UI to display its data and a button to remove it from the bone.
 	"""
+	acceptsChangeDetails = True # onDataChanged also takes the keys of merged changes
 
 	def __init__(self, parent, module, data, using=None, errorInfo=None, *args, **kwargs ):
 		"""
@@ -667,7 +672,7 @@ class RelationalMultiSelectionBoneEntry(html5.Div):
 
 	def onAttach(self):
 		super(RelationalMultiSelectionBoneEntry, self).onAttach()
-		NetworkService.registerChangeListener(self)
+		NetworkService.registerChangeListener(self, module=self.relationalBone.destModule, key=self.data["dest"]["key"])
 
 		if self.relationalBone["disabled"]:
 			self.disable()
@@ -676,8 +681,11 @@ class RelationalMultiSelectionBoneEntry(html5.Div):
 		NetworkService.removeChangeListener(self)
 		super(RelationalMultiSelectionBoneEntry, self).onDetach()
 
-	def onDataChanged(self, module, key = None, **kwargs):
-		if module != self.relationalBone.destModule or key != self.data["dest"]["key"]:
+	def onDataChanged(self, module, key = None, keys = None, **kwargs):
+		if module != self.relationalBone.destModule:
+			return
+
+		if key != self.data["dest"]["key"] and not (keys and self.data["dest"]["key"] in keys):
 			return
 
 		self.update()
@@ -4,13 +4,16 @@ from priorityqueue import editBoneSelector, viewDelegateSelector, extendedSearch
 from event import EventDispatcher
 from i18n import translate
 from config import conf
-from bones.base import BaseBoneExtractor
+from bones.base import BaseBoneExtractor, BaseViewBoneDelegate, allowHtmlRender, getOptions
 
 class SelectMultiBoneExtractor(BaseBoneExtractor):
+	def __init__(self, moduleName, boneName, skelStructure, *args, **kwargs):
+		super(SelectMultiBoneExtractor, self).__init__(moduleName, boneName, skelStructure, *args, **kwargs)
+		self.options = {} # Option maps of select bones, built on first use
 
 	def render(self, data, field):
 		if field in data.keys():
-			options = {k: v for k, v in self.skelStructure[field]["values"]}
+			options = getOptions(self.options, self.skelStructure, field)
 			result = list()
 
 			for fieldKey in data[field]:
@@ -25,17 +28,15 @@ class SelectMultiBoneExtractor(BaseBoneExtractor):
 
 		return conf["empty_value"]
 
-class SelectMultiViewBoneDelegate( object ):
+class SelectMultiViewBoneDelegate( BaseViewBoneDelegate ):
 	def __init__(self, moduleName, boneName, skelStructure, *args, **kwargs ):
-		super( SelectMultiViewBoneDelegate, self ).__init__()
-		self.skelStructure = skelStructure
-		self.boneName = boneName
-		self.moduleName = moduleName
+		super( SelectMultiViewBoneDelegate, self ).__init__( moduleName, boneName, skelStructure, *args, **kwargs )
+		self.options = {} # Option maps of select bones, built on first use
 
 	def render( self, data, field ):
 		if field in data.keys():
 			result = html5.Ul()
-			options = {k: v for k, v in self.skelStructure[field]["values"]}
+			options = getOptions(self.options, self.skelStructure, field)
 
 			for i, fieldKey in enumerate(data[field]):
 				if conf["maxMultiBoneEntries"] and i + 1 > conf["maxMultiBoneEntries"]:
@@ -58,6 +59,27 @@ class SelectMultiViewBoneDelegate( object ):
 
 		return html5.Label(conf["empty_value"])
 
+	def renderHtml(self, data, field):
+		"""
+			Like render(), but returns the cell as HTML string.
+		"""
+		if field in data.keys():
+			result = []
+			options = getOptions(self.options, self.skelStructure, field)
+
+			for i, fieldKey in enumerate(data[field]):
+				if conf["maxMultiBoneEntries"] and i + 1 > conf["maxMultiBoneEntries"]:
+					result.append("<li class=\"selectmulti_more_li\">%s</li>" % utils.escapeHtml(
+						translate("and {count} more", count=len(data[field]) - conf["maxMultiBoneEntries"])))
+					break
+
+				result.append("<li title=\"%s\">%s</li>" % (
+					utils.escapeHtml(fieldKey), utils.escapeHtml(options.get(fieldKey, fieldKey))))
+
+			return "<ul>%s</ul>" % "".join(result)
+
+		return "<label>%s</label>" % utils.escapeHtml(conf["empty_value"])
+
 class SelectMultiEditBone(html5.Div):
 
 	def __init__(self, moduleName, boneName, readOnly, values, *args, **kwargs):
@@ -167,6 +189,7 @@ def CheckForSelectMultiBone(moduleName, boneName, skelStructure, *args, **kwargs
 #Register this Bone in the global queue
 editBoneSelector.insert( 3, CheckForSelectMultiBone, SelectMultiEditBone)
 viewDelegateSelector.insert( 3, CheckForSelectMultiBone, SelectMultiViewBoneDelegate)
+allowHtmlRender(SelectMultiViewBoneDelegate)
 extendedSearchWidgetSelector.insert( 1, ExtendedSelectMultiSearch.canHandleExtension, ExtendedSelectMultiSearch )
 extractorDelegateSelector.insert(3, CheckForSelectMultiBone, SelectMultiBoneExtractor)
 
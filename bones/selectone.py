@@ -1,33 +1,33 @@
 #!/usr/bin/env python2
 # -*- coding: utf-8 -*-
-import html5
+import html5, utils
 from priorityqueue import editBoneSelector, viewDelegateSelector, extendedSearchWidgetSelector, extractorDelegateSelector
 from event import EventDispatcher
 from i18n import translate
 from config import conf
-from bones.base import BaseBoneExtractor
+from bones.base import BaseBoneExtractor, BaseViewBoneDelegate, allowHtmlRender, getOptions
 
 class SelectOneBoneExtractor(BaseBoneExtractor):
+	def __init__(self, moduleName, boneName, skelStructure, *args, **kwargs):
+		super(SelectOneBoneExtractor, self).__init__(moduleName, boneName, skelStructure, *args, **kwargs)
+		self.options = {} # Option maps of select bones, built on first use
 
 	def render(self, data, field):
 		if field in data and field in self.skelStructure:
-			options = {k: v for k, v in self.skelStructure[field]["values"]}
-			return options.get(data[field], conf["empty_value"])
+			return getOptions(self.options, self.skelStructure, field).get(data[field], conf["empty_value"])
 
 		return conf["empty_value"]
 
 
-class SelectOneViewBoneDelegate( object ):
+class SelectOneViewBoneDelegate( BaseViewBoneDelegate ):
 	def __init__(self, moduleName, boneName, skelStructure, *args, **kwargs ):
-		super( SelectOneViewBoneDelegate, self ).__init__()
-		self.skelStructure = skelStructure
-		self.boneName = boneName
-		self.moduleName = moduleName
+		super( SelectOneViewBoneDelegate, self ).__init__( moduleName, boneName, skelStructure, *args, **kwargs )
+		self.options = {} # Option maps of select bones, built on first use
 
 	def render( self, data, field ):
 		if field in data.keys():
 			if data and field and field in self.skelStructure:
-				options = {k: v for k, v in self.skelStructure[field]["values"]}
+				options = getOptions(self.options, self.skelStructure, field)
 
 				aspan = html5.Span()
 				aspan.appendChild(html5.TextNode(options.get(data[field], data[field])))
@@ -36,6 +36,19 @@ class SelectOneViewBoneDelegate( object ):
 
 		return html5.Label(conf["empty_value"])
 
+	def renderHtml(self, data, field):
+		"""
+			Like render(), but returns the cell as HTML string.
+		"""
+		if field in data.keys():
+			if data and field and field in self.skelStructure:
+				options = getOptions(self.options, self.skelStructure, field)
+
+				return "<span title=\"%s\">%s</span>" % (
+					utils.escapeHtml(data[field]), utils.escapeHtml(options.get(data[field], data[field])))
+
+		return "<label>%s</label>" % utils.escapeHtml(conf["empty_value"])
+
 class SelectOneEditBone( html5.Select ):
 
 	def __init__(self, moduleName, boneName, readOnly, values, *args, **kwargs):
@@ -135,5 +148,6 @@ def CheckForSelectOneBone(moduleName, boneName, skelStructure, *args, **kwargs):
 #Register this Bone in the global queue
 editBoneSelector.insert( 3, CheckForSelectOneBone, SelectOneEditBone)
 viewDelegateSelector.insert( 3, CheckForSelectOneBone, SelectOneViewBoneDelegate)
+allowHtmlRender(SelectOneViewBoneDelegate)
 extendedSearchWidgetSelector.insert( 1, ExtendedSelectOneSearch.canHandleExtension, ExtendedSelectOneSearch )
 extractorDelegateSelector.insert(3, CheckForSelectOneBone, SelectOneBoneExtractor)
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
-import html5
-from bones.base import BaseBoneExtractor
+import html5, utils
+from bones.base import BaseBoneExtractor, allowHtmlRender
 from config import conf
 from event import EventDispatcher
 from i18n import translate
@@ -57,8 +57,17 @@ class StringViewBoneDelegate(object):
 		self.moduleName = moduleName
 
 	def render(self, data, field):
+		return self.getViewElement(self.getViewText(data, field), False)
+
+	def renderHtml(self, data, field):
+		"""
+			Like render(), but returns the cell as HTML string.
+		"""
+		return self.getViewHtml(self.getViewText(data, field), False)
+
+	def getViewText(self, data, field):
 		if field not in data:
-			return self.getViewElement(conf["empty_value"], False)
+			return conf["empty_value"]
 
 		value = data[field]
 
@@ -73,11 +82,9 @@ class StringViewBoneDelegate(object):
 
 		# no langobject
 		if isinstance(value, list):
-			output = ", ".join(value)
-		else:
-			output = str(value)
+			return ", ".join(value)
 
-		return self.getViewElement(output, False)
+		return str(value)
 
 	def getViewElement(self, labelstr, datafield):
 		labelstr = html5.utils.unescape(labelstr)
@@ -90,6 +97,14 @@ class StringViewBoneDelegate(object):
 			aspan["title"] = str(datafield)
 			return aspan
 
+	def getViewHtml(self, labelstr, datafield):
+		labelstr = utils.escapeHtml(html5.utils.unescape(labelstr))
+
+		if not datafield:
+			return "<label>%s</label>" % labelstr
+
+		return "<span title=\"%s\">%s</span>" % (utils.escapeHtml(datafield), labelstr)
+
 
 class Tag(html5.Span):
 	def __init__(self, parentBone, tag, isEditMode, readonly=False, multiLine=False, *args, **kwargs):
@@ -522,5 +537,6 @@ class ExtendedStringSearch(html5.Div):
 # Register this Bone in the global queue
 editBoneSelector.insert(3, CheckForStringBone, StringEditBone)
 viewDelegateSelector.insert(3, CheckForStringBone, StringViewBoneDelegate)
+allowHtmlRender(StringViewBoneDelegate)
 extendedSearchWidgetSelector.insert(1, ExtendedStringSearch.canHandleExtension, ExtendedStringSearch)
 extractorDelegateSelector.insert(3, CheckForStringBone, StringBoneExtractor)
@@ -64,6 +64,41 @@ conf = {
 	# Number of rows to fetch in list widgets
 	"batchSize": 20,
 
+	# Limits for adapting the number of rows fetched at once in list widgets
+	"batchSize.min": 10,
+	"batchSize.max": 100,
+
+	# Batches are enlarged while fetching one takes longer than this time in ms...
+	"batchSize.slowRequest": 300,
+
+	# ...and reduced while rendering one takes longer than this time in ms
+	"batchSize.renderBudget": 50,
+
+	# Number of batches fetched in advance in list widgets
+	"batchSize.readAhead": 1,
+
+	# Number of rows rendered at once when a batch is added to a table
+	"table.renderChunkSize": 10,
+
+	# Time in ms per animation frame a table may spend rendering rows
+	"table.renderBudget": 12,
+
+	# Only keep the rows in and near the viewport of a table in the DOM
+	"table.virtualize": True,
+
+	# Number of rows rendered above and below the viewport of a virtualized table
+	"table.overscan": 20,
+
+	# Assumed row height in px of a virtualized table, until it could be measured
+	"table.rowHeight": 30,
+
+	# Minimum number of rows before the end of a table at which the next batch is requested;
+	# lists raise it to half their batch size
+	"table.prefetchRows": 10,
+
+	# Render table cells as HTML strings instead of widgets, where the view delegate supports it
+	"table.plainRender": True,
+
 	# Show bone names instead of description
 	"showBoneNames": False,
 
@@ -76,5 +111,44 @@ conf = {
 	# Global ViUR Logics interpreter instance
 	"logics": Interpreter(),
 
-	"updateParams": None
+	"updateParams": None,
+
+	# Maximum number of responses kept in the network cache
+	"network.cache.size": 100,
+
+	# Default time-to-live in seconds for cached responses
+	"network.cache.ttl": 300,
+
+	# Number of security keys fetched in advance for secure requests
+	"network.skey.poolSize": 2,
+
+	# Maximum age in seconds of a prefetched security key
+	"network.skey.ttl": 600,
+
+	# Endpoint bundling multiple requests into one round trip; None disables batching
+	"network.batch.url": None,
+
+	# Maximum number of requests per batch
+	"network.batch.size": 20,
+
+	# Maximum number of concurrently running requests; interactive requests are never held back
+	"network.maxRequests": 4,
+
+	# Number of finished requests kept for the network statistics; 0 disables them
+	"network.stats.size": 500,
+
+	# Maximum number of ETag/Last-Modified validators kept for conditional requests
+	"network.validators.size": 200,
+
+	# Time in seconds a validator is kept
+	"network.validators.ttl": 3600,
+
+	# Request parameter asking the server to leave out already known structures; None always requests them
+	"network.structure.omitParam": None,
+
+	# Maximum size in characters of all values kept in the persistent cache
+	"persistentCache.maxSize": 4 * 1024 * 1024,
+
+	# Maximum size in characters of a single value kept in the persistent cache
+	"persistentCache.maxEntrySize": 2 * 1024 * 1024
 }
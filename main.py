@@ -1,10 +1,12 @@
 #-*- coding: utf-8 -*-
-import html5, i18n, pyjd, network
+import json, html5, i18n, pyjd, network
 
 from login import LoginScreen
 from admin import AdminScreen
 from config import conf
 from i18n import translate
+from persistentcache import persistentCache
+from priorityqueue import startupQueue
 
 try:
 	import vi_plugins
@@ -21,7 +23,78 @@ class Application(html5.Div):
 		self.loginScreen = None
 		self.adminScreen = None
 
+		self.cachedConfig = None # Configuration the admin screen was painted from, taken from the persistent cache
+		self.configText = None # Configuration received from the server, stored once the user is confirmed
+
 		self.startup()
+		self.confirmUser()
+
+	def getCacheKey(self, name):
+		"""
+			Returns the key of the persistent cache entry 'name' for the current
+			server version and user, or None if one of them is not known yet.
+		"""
+		if conf["server.version"] is None or not conf["currentUser"]:
+			return None
+
+		return "%s.%s.%s" % (name, ".".join([str(x) for x in conf["server.version"]]), conf["currentUser"]["key"])
+
+	def confirmUser(self):
+		"""
+			Fetches the logged-in user in the background, so the admin screen can
+			be painted from the persistent cache of that user.
+		"""
+		network.NetworkService.request("user", "view/self",
+		                               successHandler=self.onUserConfirmed,
+		                               failureHandler=self.onUserUnconfirmed)
+
+	def onUserConfirmed(self, req):
+		answ = network.NetworkService.decode(req)
+		if answ.get("action") != "view" or self.loginScreen:
+			return
+
+		if conf["vi.access.rights"] and not any([x in answ["values"].get("access", []) for x in conf["vi.access.rights"]]):
+			return
+
+		conf["currentUser"] = answ["values"]
+		self.onStartupKeyAvailable()
+
+	def onUserUnconfirmed(self, req, code):
+		# Nothing to paint; the configuration request leads to the login
+		pass
+
+	def onStartupKeyAvailable(self):
+		"""
+			Reads the persistent cache entries of the current server version and
+			user, and stores the configuration if it was already received.
+		"""
+		key = self.getCacheKey("startup")
+		if not key:
+			return
+
+		network.NetworkService.structures.load(self.getCacheKey("structures"))
+
+		if self.configText is not None:
+			persistentCache.set(key, self.configText)
+			self.configText = None
+		elif not conf["mainConfig"]:
+			persistentCache.get(key, self.onCachedStartupAvailable)
+
+	def onCachedStartupAvailable(self, cached):
+		"""
+			Paints the admin screen from the configuration of the last start,
+			while the current configuration is fetched in the background.
+		"""
+		if not cached or conf["mainConfig"] or self.loginScreen or not conf["currentUser"]:
+			return
+
+		conf["mainConfig"] = json.loads(cached)
+		self.cachedConfig = cached
+
+		if not self.adminScreen:
+			self.adminScreen = AdminScreen()
+
+		self.adminScreen.invoke()
 
 	def startup(self, *args, **kwargs):
 
@@ -39,6 +112,7 @@ class Application(html5.Div):
 
 	def getVersionSuccess(self, req):
 		conf["server.version"] = network.NetworkService.decode(req)
+		self.onStartupKeyAvailable()
 
 		if ((conf["server.version"][0] >= 0                              # check version?
 			and (conf["server.version"][0] != conf["vi.version"][0]      # major version mismatch
@@ -63,8 +137,26 @@ class Application(html5.Div):
 		self.startup()
 
 	def getConfigSuccess(self, req):
+		network.NetworkService.skeys.refill()
+
+		key = self.getCacheKey("startup")
+		if key:
+			persistentCache.set(key, req.result)
+		else:
+			self.configText = req.result
+
+		if self.cachedConfig is not None and self.cachedConfig == req.result and self.adminScreen:
+			# Already painted from the persistent cache, and nothing changed
+			return
+
+		self.cachedConfig = None
 		conf["mainConfig"] = network.NetworkService.decode(req)
 
+		if startupQueue.isRunning:
+			# The admin screen is still being painted from the persistent cache;
+			# it picks up the current configuration when its startup queue finishes.
+			return
+
 		if not self.adminScreen:
 			self.adminScreen = AdminScreen()
 
@@ -82,6 +174,17 @@ class Application(html5.Div):
 			)
 
 	def login(self, logout=False):
+		if logout:
+			persistentCache.clear()
+
+		self.cachedConfig = None
+		self.configText = None
+
+		network.NetworkService.cache.clear()
+		network.NetworkService.skeys.clear()
+		network.NetworkService.validators.clear()
+		network.NetworkService.structures.clear()
+
 		if not self.loginScreen:
 			self.loginScreen = LoginScreen()
 
@@ -130,6 +233,7 @@ if __name__ == '__main__':
 
 	# Configure vi as network render prefix
 	network.NetworkService.prefix = "/vi"
+	network.NetworkStats.expose()
 	conf["currentlanguage"] = i18n.getLanguage()
 
 	# Application
@@ -1,6 +1,220 @@
 # -*- coding: utf-8 -*-
-import os, sys, json, string, random, time
+import os, sys, json, random, time
 from config import conf
+from persistentcache import persistentCache
+
+class Scheduler( object ):
+	"""
+		Central scheduler for deferred work.
+
+		Instead of arming one browser timer per call, pending calls are collected
+		into queues which are flushed at once:
+
+			- micro: runs right after the current task (Promise microtask)
+			- frame: runs before the next repaint (requestAnimationFrame)
+			- idle: runs when the browser is idle (requestIdleCallback)
+			- timer: runs after a delay; all timers share one setTimeout
+
+		A call with the same key as a call still pending in the same queue (and for
+		timers, due within the same frame) is only run once. The key is made of the
+		function and a token given by the caller; calls without a token are
+		identified by their arguments if these are plain and short values,
+		otherwise they are never merged.
+	"""
+	frameTime = 16 # Maximum time in ms two timers may be apart to be considered within the same tick
+	idleTimeout = 1000 # Time in ms after which the idle queue is flushed anyway
+	maxTokenLength = 100 # Longer strings don't serve to identify a call, like response bodies
+
+	queues = {"micro": [], "frame": [], "idle": [], "timer": []}
+	pending = {"micro": {}, "frame": {}, "idle": {}, "timer": {}} # Keys of the pending calls (for timers, ->due)
+	scheduled = {"micro": False, "frame": False, "idle": False}
+	timerDue = None # Time in ms the shared timer is armed for
+
+	@staticmethod
+	def now():
+		return time.time() * 1000
+
+	@staticmethod
+	def genKey(func, args, kwargs, token=None):
+		"""
+			Builds the key identifying a call, or returns None if the call can't be
+			identified. Bound methods are identified by their object and name, as
+			each access to a method creates a new method object.
+			:param token: Identifies the call among the calls of func; defaults to the arguments.
+			:returns: str or None
+		"""
+		if token is None:
+			values = list(args) + list(kwargs.keys()) + list(kwargs.values())
+
+			for value in values:
+				if isinstance(value, str):
+					if len(value) > Scheduler.maxTokenLength:
+						return None
+				elif value is not None and not isinstance(value, (int, float, bool)):
+					return None
+
+			token = repr(args) + repr(kwargs) if values else ""
+
+		owner = getattr(func, "im_self", None)
+		if owner is not None:
+			return "%s.%s|%s" % (id(owner), func.__name__, token)
+
+		return "%s|%s" % (id(func), token)
+
+	@staticmethod
+	def schedule(func, args=(), kwargs=None, queue="timer", delay=0, key=None):
+		"""
+			Schedules func(*args, **kwargs) in the given queue.
+
+			:param queue: One of "micro", "frame", "idle" or "timer".
+			:type queue: str
+			:param delay: Delay in ms, only used by the "timer" queue.
+			:type delay: int
+			:param key: Token identifying the call among the calls of func, see genKey().
+		"""
+		assert queue in Scheduler.queues.keys(), "Invalid queue %s" % queue
+		kwargs = kwargs or {}
+		key = Scheduler.genKey(func, args, kwargs, key)
+		pending = Scheduler.pending[queue]
+
+		if queue == "timer":
+			due = Scheduler.now() + delay
+
+			if key is not None:
+				if key in pending and abs(pending[key] - due) <= Scheduler.frameTime:
+					return
+
+				pending[key] = due
+
+			Scheduler.queues["timer"].append((func, args, kwargs, due, key))
+			Scheduler.armTimer(due)
+			return
+
+		if key is not None:
+			if key in pending:
+				return
+
+			pending[key] = True
+
+		Scheduler.queues[queue].append((func, args, kwargs))
+
+		if Scheduler.scheduled[queue]:
+			return
+
+		Scheduler.scheduled[queue] = True
+		w = eval("window")
+
+		if queue == "micro":
+			if w.queueMicrotask:
+				w.queueMicrotask(Scheduler.flushMicro)
+			elif w.Promise:
+				w.Promise.resolve().then(Scheduler.flushMicro)
+			else:
+				w.setTimeout(Scheduler.flushMicro, 0)
+
+		elif queue == "frame":
+			if w.requestAnimationFrame:
+				w.requestAnimationFrame(Scheduler.flushFrame)
+			else:
+				w.setTimeout(Scheduler.flushFrame, Scheduler.frameTime)
+
+		else:
+			if w.requestIdleCallback:
+				w.requestIdleCallback(Scheduler.flushIdle, {"timeout": Scheduler.idleTimeout})
+			else:
+				w.setTimeout(Scheduler.flushIdle, Scheduler.frameTime)
+
+	@staticmethod
+	def armTimer(due):
+		"""
+			Arms the shared timer, unless it already fires before due.
+		"""
+		if Scheduler.timerDue is not None and Scheduler.timerDue <= due:
+			return
+
+		Scheduler.timerDue = due
+		eval("window").setTimeout(Scheduler.flushTimer, max(0, due - Scheduler.now()))
+
+	@staticmethod
+	def run(entries):
+		"""
+			Runs the given calls. Exceptions don't stop the remaining calls; they
+			are raised again afterwards, each in its own task, so they still reach
+			the console.
+		"""
+		errors = []
+
+		for func, args, kwargs in entries:
+			try:
+				func(*args, **kwargs)
+			except Exception as e:
+				errors.append(e)
+
+		for e in errors:
+			Scheduler.rethrow(e)
+
+	@staticmethod
+	def rethrow(e):
+		"""
+			Raises e from a separate task.
+		"""
+		def throw():
+			raise e
+
+		eval("window").setTimeout(throw, 0)
+
+	@staticmethod
+	def flush(queue):
+		"""
+			Runs all calls currently pending in queue.
+			Calls scheduled while flushing are run with the next flush.
+		"""
+		Scheduler.scheduled[queue] = False
+		entries = Scheduler.queues[queue]
+		Scheduler.queues[queue] = []
+		Scheduler.pending[queue] = {}
+		Scheduler.run(entries)
+
+	@staticmethod
+	def flushMicro(*args, **kwargs):
+		Scheduler.flush("micro")
+
+	@staticmethod
+	def flushFrame(*args, **kwargs):
+		Scheduler.flush("frame")
+
+	@staticmethod
+	def flushIdle(*args, **kwargs):
+		Scheduler.flush("idle")
+
+	@staticmethod
+	def flushTimer(*args, **kwargs):
+		"""
+			Runs all timers that are due and re-arms the shared timer for the next one.
+		"""
+		now = Scheduler.now()
+		Scheduler.timerDue = None
+
+		due = []
+		pending = []
+		keys = Scheduler.pending["timer"]
+
+		for entry in Scheduler.queues["timer"]:
+			if entry[3] <= now:
+				due.append(entry[:3])
+
+				if entry[4] is not None and keys.get(entry[4]) == entry[3]:
+					del keys[entry[4]]
+			else:
+				pending.append(entry)
+
+		Scheduler.queues["timer"] = pending
+		Scheduler.run(due)
+
+		# Re-arm for the earliest timer, including those scheduled while running.
+		pending = Scheduler.queues["timer"]
+		if pending:
+			Scheduler.armTimer(min([entry[3] for entry in pending]))
 
 class DeferredCall( object ):
 	"""
@@ -8,6 +222,11 @@ class DeferredCall( object ):
 		This allows assuming that calls to NetworkService are always
 		asynchronous, so its guaranteed that any initialization code can run
 		before the Network-Call yields results.
+
+		The call is queued in the Scheduler; pass _delay to change the delay
+		(a delay of 0 runs it as a microtask), or _queue to run it in the
+		"frame" or "idle" queue instead. Pass _key to merge calls of the same
+		function with the same key, regardless of their arguments.
 	"""
 	def __init__( self, func, *args, **kwargs ):
 		"""
@@ -19,15 +238,25 @@ class DeferredCall( object ):
 		if "_delay" in kwargs.keys():
 			delay = kwargs["_delay"]
 			del kwargs["_delay"]
+
+		queue = "micro" if not delay else "timer"
+		if "_queue" in kwargs.keys():
+			queue = kwargs["_queue"]
+			del kwargs["_queue"]
+
+		key = None
+		if "_key" in kwargs.keys():
+			key = kwargs["_key"]
+			del kwargs["_key"]
+
 		self._tFunc = func
 		self._tArgs = args
 		self._tKwArgs = kwargs
-		w = eval("window")
-		w.setTimeout(self.run, delay)
+		Scheduler.schedule(func, args, kwargs, queue=queue, delay=delay, key=key)
 
 	def run(self):
 		"""
-			Internal callback that executes the callback function
+			Executes the callback function immediately
 		"""
 		self._tFunc( *self._tArgs, **self._tKwArgs )
 
@@ -41,16 +270,22 @@ class HTTPRequest(object):
 		self.req.onreadystatechange = self.onReadyStateChange
 		self.cb = None
 		self.hasBeenSent = False
+		self.isAborted = False
+		self.firstByteAt = None # Time in ms when the response headers arrived
+		self.headers = {} # Additional request headers
 
-	def asyncGet(self, url, cb):
+	def asyncGet(self, url, cb, headers=None):
 		"""
 			Performs a GET operation on a remote server
 			:param url: The url to fetch. Either absolute or relative to the server
 			:type url: str
 			:param cb: Target object to call "onCompletion" on success
 			:type cb: object
+			:param headers: Additional request headers, like conditional ones
+			:type headers: dict
 		"""
 		self.cb = cb
+		self.headers = headers or {}
 		self.type = "GET"
 		self.payload = None
 		self.content_type = None
@@ -70,24 +305,600 @@ class HTTPRequest(object):
 		self.content_type = content_type
 		self.req.open("POST",url,True)
 
+	def abort(self):
+		"""
+			Cancels the request. The callback object won't be informed anymore.
+		"""
+		self.isAborted = True
+		self.req.abort()
+
+	def getResponseHeader(self, name):
+		"""
+			Returns the value of response header 'name' or None.
+		"""
+		return self.req.getResponseHeader(name) or None
+
 	def onReadyStateChange(self, *args, **kwargs):
 		"""
 			Internal callback.
 		"""
+		if self.isAborted:
+			return
+
 		if self.req.readyState == 1 and not self.hasBeenSent:
 			self.hasBeenSent = True # Internet Explorer calls this function twice!
 
 			if self.type=="POST" and self.content_type is not None:
 				self.req.setRequestHeader('Content-Type', self.content_type)
 
+			for k, v in self.headers.items():
+				self.req.setRequestHeader(k, v)
+
 			self.req.send( self.payload )
 
+		if self.req.readyState >= 2 and self.firstByteAt is None:
+			self.firstByteAt = time.time() * 1000
+
 		if self.req.readyState == 4:
 			if self.req.status >= 200 and self.req.status < 300:
 				self.cb.onCompletion( self.req.responseText )
 			else:
 				self.cb.onError( self.req.responseText, self.req.status )
 
+class NetworkStats(object):
+	"""
+		Collects timing, size, retry and cache metrics of finished requests in a
+		ring buffer of conf["network.stats.size"] entries, and aggregates them per
+		module or per endpoint.
+
+		The statistics are available from the JavaScript console by calling
+		viNetworkStats() for the aggregates or viNetworkStats(true) for all
+		recorded requests, both as JSON.
+	"""
+	entries = [] # Ring buffer of recorded requests
+	nextIdx = 0 # Position in entries to write the next record to
+
+	@staticmethod
+	def record(req, status):
+		"""
+			Records the metrics of the finished request 'req'.
+			:param status: HTTP status code or "succeeded"
+		"""
+		size = conf["network.stats.size"]
+		if not size:
+			return
+
+		now = time.time() * 1000
+		kickoffAt = req.kickoffAt or now
+		sentAt = req.sentAt or kickoffAt
+
+		entry = {
+			"module": req.module,
+			"url": req.url,
+			"endpoint": NetworkStats.genEndpoint(req.module, req.url),
+			"status": status,
+			"queue": int(sentAt - kickoffAt),
+			"ttfb": int(req.firstByteAt - sentAt) if req.firstByteAt else None,
+			"total": int(now - kickoffAt),
+			"bytes": len(req.result or ""),
+			"decode": int(req.decodeTime),
+			"retries": req.retries,
+			"cache": "hit" if req.fromCache else ("shared" if req.leader else ("miss" if req.cacheable else None))
+		}
+
+		if len(NetworkStats.entries) < size:
+			NetworkStats.entries.append(entry)
+		else:
+			NetworkStats.entries[NetworkStats.nextIdx % size] = entry
+
+		NetworkStats.nextIdx = (NetworkStats.nextIdx + 1) % size
+
+	@staticmethod
+	def genEndpoint(module, url):
+		"""
+			Strips keys and other variable parts from an url, so requests to the
+			same function of a module are aggregated together.
+		"""
+		parts = url.split("?", 1)[0].split("/")
+		res = [parts[0]] + [x for x in parts[1:] if x in ["node", "leaf"]]
+		return "%s/%s" % (module or "", "/".join(res))
+
+	@staticmethod
+	def percentile(values, p):
+		"""
+			Returns the p-th percentile (0..1) of the sorted list 'values'.
+		"""
+		if not values:
+			return None
+
+		return values[int(round(p * (len(values) - 1)))]
+
+	@staticmethod
+	def summary(by="endpoint"):
+		"""
+			Aggregates the recorded requests.
+			:param by: Either "module" or "endpoint"
+			:type by: str
+			:returns: dict of name->{count, p50, p95, ttfb50, bytes, retries, hits}
+		"""
+		groups = {}
+
+		for entry in NetworkStats.entries:
+			name = entry[by] or ""
+			if not name in groups:
+				groups[name] = []
+
+			groups[name].append(entry)
+
+		res = {}
+		for name, entries in groups.items():
+			totals = [x["total"] for x in entries]
+			totals.sort()
+			ttfbs = [x["ttfb"] for x in entries if x["ttfb"] is not None]
+			ttfbs.sort()
+
+			res[name] = {
+				"count": len(entries),
+				"p50": NetworkStats.percentile(totals, 0.5),
+				"p95": NetworkStats.percentile(totals, 0.95),
+				"ttfb50": NetworkStats.percentile(ttfbs, 0.5),
+				"bytes": sum([x["bytes"] for x in entries]),
+				"retries": sum([x["retries"] for x in entries]),
+				"hits": len([x for x in entries if x["cache"] == "hit"])
+			}
+
+		return res
+
+	@staticmethod
+	def export(raw=False):
+		"""
+			Returns the recorded requests (if raw is set) or their aggregates as JSON.
+		"""
+		if raw:
+			return json.dumps(NetworkStats.entries)
+
+		return json.dumps({
+			"modules": NetworkStats.summary("module"),
+			"endpoints": NetworkStats.summary("endpoint"),
+			"retryStats": NetworkService.retryStats
+		})
+
+	@staticmethod
+	def expose():
+		"""
+			Makes the statistics available as viNetworkStats() in the JavaScript console.
+		"""
+		w = eval("window.top")
+		w.viNetworkStats = NetworkStats.export
+
+
+class NetworkCache(object):
+	"""
+		In-memory cache for responses of cacheable requests.
+
+		Entries are keyed by module, url and parameters. Each entry expires after
+		its time-to-live, and the least recently used entry is evicted when the
+		cache exceeds its maximum size.
+	"""
+	def __init__(self, maxEntries=None, ttl=None):
+		"""
+			:param maxEntries: Maximum number of entries; defaults to conf["network.cache.size"]
+			:type maxEntries: int
+			:param ttl: Default time-to-live in seconds; defaults to conf["network.cache.ttl"]
+			:type ttl: int
+		"""
+		super(NetworkCache, self).__init__()
+		self.maxEntries = maxEntries
+		self.ttl = ttl
+		self.clear()
+
+	def clear(self):
+		"""
+			Drops all entries.
+		"""
+		self._entries = {} # cache-key -> entry
+		self._tick = 0 # Access counter used for LRU eviction
+
+	@staticmethod
+	def genKey(module, url, params):
+		"""
+			Builds the cache-key for a request.
+		"""
+		if isinstance(params, dict):
+			keys = list(params.keys())
+			keys.sort()
+			params = "&".join(["%s=%s" % (k, str(params[k])) for k in keys])
+
+		return "%s|%s|%s" % (module or "", url, str(params or ""))
+
+	@staticmethod
+	def genEntityKey(url, params):
+		"""
+			Determines the key of the entity a request refers to, if any.
+			This is either the "key" parameter or the last part of a view-url.
+		"""
+		if isinstance(params, dict) and params.get("key"):
+			return params["key"]
+
+		parts = url.split("/")
+		if parts[0] == "view" and len(parts) > 1:
+			return parts[-1]
+
+		return None
+
+	def get(self, module, url, params):
+		"""
+			Returns the cached result for the given request or None if there is no
+			valid entry.
+		"""
+		key = NetworkCache.genKey(module, url, params)
+		entry = self._entries.get(key)
+
+		if entry is None:
+			return None
+
+		if entry["expires"] < time.time():
+			del self._entries[key]
+			return None
+
+		self._tick += 1
+		entry["used"] = self._tick
+		return entry["result"]
+
+	def put(self, module, url, params, result, ttl=None):
+		"""
+			Stores the result of a request.
+			:param ttl: Time-to-live in seconds for this entry, overrides the cache's default
+			:type ttl: int
+		"""
+		ttl = ttl or self.ttl or conf["network.cache.ttl"]
+		maxEntries = self.maxEntries or conf["network.cache.size"]
+
+		if not ttl or not maxEntries:
+			return
+
+		key = NetworkCache.genKey(module, url, params)
+
+		self._tick += 1
+		self._entries[key] = {
+			"module": module,
+			"key": NetworkCache.genEntityKey(url, params),
+			"result": result,
+			"expires": time.time() + ttl,
+			"used": self._tick
+		}
+
+		while len(self._entries) > maxEntries:
+			lru = None
+			for k, entry in self._entries.items():
+				if lru is None or entry["used"] < self._entries[lru]["used"]:
+					lru = k
+
+			del self._entries[lru]
+
+	def invalidate(self, module, key=None):
+		"""
+			Drops the entries of a module.
+			If key is given, only entries that refer to that key or to no specific
+			entity (like lists) are dropped; views of other entities are kept.
+			:param module: Name of the module
+			:type module: str
+			:param key: Key of the changed entity
+			:type key: str
+		"""
+		for k, entry in list(self._entries.items()):
+			if entry["module"] != module:
+				continue
+
+			if key and entry["key"] and entry["key"] != key:
+				continue
+
+			del self._entries[k]
+
+
+class SecurityKeyPool(object):
+	"""
+		Keeps a small number of security keys fetched in advance, so requests
+		requiring a security key don't have to wait for an extra round trip.
+		The pool is refilled in the background whenever a key is taken.
+	"""
+	def __init__(self):
+		super(SecurityKeyPool, self).__init__()
+		self._keys = [] # List of (key, fetch time)
+		self._pending = 0 # Number of keys currently being fetched
+		self._discard = 0 # Number of pending keys to throw away when they arrive
+
+	def clear(self):
+		"""
+			Drops all keys, e.g. when the session changes.
+			Keys still being fetched are discarded on arrival.
+		"""
+		self._keys = []
+		self._discard = self._pending
+
+	def take(self):
+		"""
+			Takes a key from the pool and triggers a refill.
+			:returns: The security key or None if the pool is empty.
+		"""
+		now = time.time()
+		key = None
+
+		while self._keys:
+			k, fetched = self._keys.pop(0)
+			if now - fetched < conf["network.skey.ttl"]:
+				key = k
+				break
+
+		self.refill()
+		return key
+
+	def refill(self):
+		"""
+			Starts fetching the keys missing to fill the pool.
+		"""
+		missing = conf["network.skey.poolSize"] - len(self._keys) - (self._pending - self._discard)
+
+		for i in range(0, missing):
+			self._pending += 1
+			HTTPRequest().asyncGet("%s%s/skey" % (NetworkService.host, NetworkService.prefix), self)
+
+	def onCompletion(self, text):
+		"""
+			Internal hook for the AJAX call.
+		"""
+		self._pending -= 1
+
+		if self._discard:
+			self._discard -= 1
+			return
+
+		self._keys.append((json.loads(text), time.time()))
+
+	def onError(self, text, code):
+		"""
+			Internal hook for the AJAX call.
+			A failed prefetch isn't retried; the next take() will try again.
+		"""
+		self._pending -= 1
+
+		if self._discard:
+			self._discard -= 1
+
+
+class RequestBatch(object):
+	"""
+		Bundles the read-only requests issued within one tick into a single
+		POST to the batch endpoint configured in conf["network.batch.url"].
+
+		The endpoint receives a JSON list of {"url": ..., "params": ...} objects
+		and must answer with a JSON list of {"status": ..., "body": ...} objects
+		in the same order. If the server doesn't support batching, batching is
+		disabled and the requests are sent individually.
+	"""
+	supported = True # Set to False once the server rejected a batch
+	current = None # The batch currently collecting requests
+
+	@staticmethod
+	def add(url, params, cb):
+		"""
+			Adds a request to the current batch.
+			:returns: False if batching is not available and the request must be sent on its own.
+		"""
+		if not conf["network.batch.url"] or not RequestBatch.supported:
+			return False
+
+		batch = RequestBatch.current
+		if batch is None:
+			batch = RequestBatch.current = RequestBatch()
+			DeferredCall(batch.flush, _delay=0)
+
+		batch.entries.append((url, params, cb))
+
+		# The whole batch occupies only one slot for concurrently running requests
+		if cb.hasSlot:
+			if batch.hasSlot:
+				NetworkService.releaseSlot(cb)
+			else:
+				cb.hasSlot = False
+				batch.hasSlot = True
+
+		if len(batch.entries) >= conf["network.batch.size"]:
+			batch.flush()
+
+		return True
+
+	def __init__(self):
+		super(RequestBatch, self).__init__()
+		self.entries = [] # List of (url, params, cb)
+		self.sent = False
+		self.hasSlot = False # True if the batch occupies a slot, taken over from its first request
+
+	def flush(self):
+		"""
+			Transmits the collected requests.
+		"""
+		if RequestBatch.current is self:
+			RequestBatch.current = None
+
+		if self.sent:
+			return
+
+		self.sent = True
+
+		if not self.entries:
+			NetworkService.releaseSlot(self)
+			return
+
+		if len(self.entries) == 1:
+			self.fallback()
+			return
+
+		payload = json.dumps([{"url": url, "params": params} for url, params, cb in self.entries])
+		HTTPRequest().asyncPost(conf["network.batch.url"], payload, self, content_type="application/json")
+
+	def fallback(self):
+		"""
+			Sends all collected requests individually.
+		"""
+		for url, params, cb in self.entries:
+			# The first request takes over the slot of the batch; the others were
+			# already admitted with it, so they take their own even beyond the limit.
+			if self.hasSlot:
+				self.hasSlot = False
+				cb.hasSlot = True
+			elif not cb.hasSlot:
+				NetworkService._running += 1
+				cb.hasSlot = True
+
+			cb.httpRequest = NetworkService.transmit(url, params, cb)
+
+	def onCompletion(self, text):
+		"""
+			Internal hook for the AJAX call; dispatches the answers to their requests.
+		"""
+		try:
+			answers = json.loads(text)
+			assert isinstance(answers, list) and len(answers) == len(self.entries)
+		except:
+			RequestBatch.supported = False
+			self.fallback()
+			return
+
+		NetworkService.releaseSlot(self)
+
+		for i in range(0, len(self.entries)):
+			cb = self.entries[i][2]
+			status = int(answers[i].get("status", 200))
+
+			if status >= 200 and status < 300:
+				cb.onCompletion(answers[i].get("body"))
+			else:
+				cb.onError(answers[i].get("body"), status)
+
+	def onError(self, text, code):
+		"""
+			Internal hook for the AJAX call.
+		"""
+		if int(code) in [400, 404, 405, 501]:
+			RequestBatch.supported = False
+
+		self.fallback()
+
+
+class StructureCache(object):
+	"""
+		Keeps the skeleton structures received with list requests per module and
+		skeleton type, so they can be reused for responses without a structure.
+
+		If conf["network.structure.omitParam"] is set, this parameter is added to
+		requests whose structure is already known, asking the server to leave it
+		out. Responses that contain a structure anyway keep the cache up to date.
+		If a structure was left out but isn't known anymore, refetchParams()
+		provides the parameters to request it again.
+
+		Once load() was called, the structures are also kept in the persistent
+		cache, so they are known right from the start of the next page load.
+	"""
+	def __init__(self):
+		super(StructureCache, self).__init__()
+		self.clear()
+
+	def clear(self):
+		"""
+			Drops all structures and stops persisting them.
+		"""
+		self._structures = {} # "module/skelType"->structure
+		self._persistKey = None # Key of the persistent cache entry holding the structures
+
+	def load(self, key):
+		"""
+			Restores the structures kept in the persistent cache under key,
+			and keeps them there from now on.
+		"""
+		self._persistKey = key
+		persistentCache.get(key, self.onLoaded)
+
+	def onLoaded(self, structures):
+		"""
+			Internal callback; structures received meanwhile take precedence.
+		"""
+		if not structures:
+			return
+
+		for k, v in structures.items():
+			if not k in self._structures:
+				self._structures[k] = v
+
+	def save(self):
+		"""
+			Writes the structures to the persistent cache.
+		"""
+		if self._persistKey:
+			persistentCache.set(self._persistKey, self._structures)
+
+	def get(self, module, skelType=None):
+		"""
+			Returns the known structure or None.
+		"""
+		return self._structures.get("%s/%s" % (module, skelType or ""))
+
+	def set(self, module, skelType, structure):
+		"""
+			Remembers the structure of a module's skeleton type.
+		"""
+		key = "%s/%s" % (module, skelType or "")
+
+		if self._structures.get(key) is structure:
+			return
+
+		self._structures[key] = structure
+
+		if self._persistKey:
+			DeferredCall(self.save, _queue="idle")
+
+	def prepare(self, module, skelType, params):
+		"""
+			Adds the parameter to leave out the structure to params, if the
+			structure is already known.
+			:returns: params
+		"""
+		param = conf["network.structure.omitParam"]
+		if param and self.get(module, skelType) is not None:
+			params[param] = "1"
+
+		return params
+
+	def resolve(self, module, skelType, data):
+		"""
+			Returns the structure for the decoded response data; either the one it
+			contains, which is remembered, or the known one.
+		"""
+		structure = data.get("structure")
+		if structure:
+			self.set(module, skelType, structure)
+			return structure
+
+		return self.get(module, skelType)
+
+	def refetchParams(self, structure, params):
+		"""
+			Checks if a response lacks its structure because it was left out on
+			request, while the structure isn't known anymore (e.g. after a new login).
+			:param structure: The structure returned by resolve()
+			:param params: The parameters of the request
+			:type params: dict
+			:returns: A copy of params to request the structure again, or None.
+		"""
+		param = conf["network.structure.omitParam"]
+		if structure is not None or not param or not params or not param in params.keys():
+			return None
+
+		params = params.copy()
+		del params[param]
+		return params
+
+
 class NetworkService( object ):
 	"""
 		Generic wrapper around ajax requests.
@@ -95,45 +906,156 @@ class NetworkService( object ):
 		the same resource. It also acts as the central proxy to notify
 		currently active widgets of changes made to data on the server.
 	"""
-	changeListeners = [] # All currently active widgets which will be informed of changes made
+	changeListeners = {} # module->key->id->listener of all widgets informed of changes made ("*" for any module, "" for any key)
+	_listenerChannels = {} # id->List of (module, key) a listener is registered for
 	_cache = {} # module->Cache index map (for requests that can be cached)
+	cache = NetworkCache() # Response cache for cacheable requests
+	skeys = SecurityKeyPool() # Prefetched security keys for secure requests
+	structures = StructureCache() # Known skeleton structures per module and skeleton type
+	validators = NetworkCache(conf["network.validators.size"], conf["network.validators.ttl"]) # ETag/Last-Modified and body per GET request
+	_inflight = {} # coalesce-key->Running request, shared by identical requests issued meanwhile
+	_pendingChanges = {} # module->Changes collected by scheduleChange, not yet broadcast
+	changeDelay = 2500 # Time in ms in which changes are collected before being broadcast
 	host = ""
 	prefix = "/json"
 	defaultFailureHandler = None
 
+	# Priority classes for requests; lower values are sent first
+	PRIORITY_INTERACTIVE = 0 # Direct reactions to user actions; never held back
+	PRIORITY_VISIBLE = 1 # Data currently shown to the user
+	PRIORITY_PREFETCH = 2 # Data that might be needed soon
+	PRIORITY_BACKGROUND = 3 # Anything else, like polling or exports
+
+	_queue = {} # priority->List of requests waiting for a free slot
+	_running = 0 # Number of requests currently occupying a slot
+
 	retryCodes = [0, -1, 500, 502]
 	retryMax = 3
-	retryDelay = 5000
+	retryDelay = 5000 # Delay in ms before the first retry; doubled with every further retry
+	retryDelayMax = 60000 # Upper limit in ms for the retry delay
+	retryBudget = 10 # Maximum number of retries of all requests within retryBudgetWindow
+	retryBudgetWindow = 30000 # Time window in ms for the retry budget
+
+	_retries = [] # Points in time (ms) of retries scheduled within the current budget window
+	retryStats = {
+		"retries": 0, # Number of retries scheduled
+		"paused": 0, # Number of retries postponed because the retry budget was exhausted
+		"exhausted": 0 # Number of requests that failed after retrying retryMax times
+	}
 
 	@staticmethod
 	def notifyChange(module, **kwargs):
 		"""
 			Broadcasts a change made to data of module 'module' to all currently
-			registered changeListeners.
-			Also invalidates our _cache
+			registered changeListeners interested in that module.
+			Also invalidates our _cache and the cached responses of that module.
+
+			Listeners may receive the keyword arguments 'key' and 'action' for a
+			change of a single entry. Listeners having the attribute
+			'acceptsChangeDetails' set to True also receive 'keys' and 'actions'
+			with the lists of all entries and actions merged into this notification;
+			'keys' is None if the change affects the whole module.
+
 			:param module: Name of the module where the change occured
 			:type module: str
 		"""
 		if module in NetworkService._cache.keys():
 			NetworkService._cache[ module ] += 1
 
-		for c in NetworkService.changeListeners:
-			c.onDataChanged(module, **kwargs)
+		if kwargs.get("keys"):
+			for key in kwargs["keys"]:
+				NetworkService.cache.invalidate(module, key)
+		else:
+			NetworkService.cache.invalidate(module, kwargs.get("key"))
+
+		keys = kwargs.get("keys") or ([kwargs["key"]] if kwargs.get("key") else None)
+		plainKwargs = dict([(k, v) for k, v in kwargs.items() if k not in ["keys", "actions"]])
+
+		for c in NetworkService.getChangeListeners(module, keys):
+			if getattr(c, "acceptsChangeDetails", False):
+				c.onDataChanged(module, **kwargs)
+			else:
+				c.onDataChanged(module, **plainKwargs)
+
+	@staticmethod
+	def scheduleChange(module, key=None, action=None):
+		"""
+			Collects a change made to data of module 'module'.
+			All changes collected within changeDelay ms are broadcast as one
+			notification per module, so listeners react only once.
+			:param module: Name of the module where the change occured
+			:type module: str
+			:param key: Key of the changed entry or None if the change affects the whole module
+			:type key: str
+			:param action: The action which caused the change
+			:type action: str
+		"""
+		if not NetworkService._pendingChanges:
+			DeferredCall(NetworkService.flushChanges, _delay=NetworkService.changeDelay)
+
+		change = NetworkService._pendingChanges.get(module)
+		if change is None:
+			change = NetworkService._pendingChanges[module] = {"keys": {}, "actions": {}, "all": False}
+
+		if key:
+			change["keys"][key] = True
+		else:
+			change["all"] = True
+
+		if action:
+			change["actions"][action] = True
 
 	@staticmethod
-	def registerChangeListener(listener):
+	def flushChanges():
+		"""
+			Broadcasts the changes collected by scheduleChange.
+		"""
+		changes = NetworkService._pendingChanges
+		NetworkService._pendingChanges = {}
+
+		for module, change in changes.items():
+			keys = None if change["all"] else list(change["keys"].keys())
+			actions = list(change["actions"].keys())
+
+			NetworkService.notifyChange(module,
+			                            key=keys[0] if keys and len(keys) == 1 else None, keys=keys,
+			                            action=actions[0] if len(actions) == 1 else None, actions=actions)
+
+	@staticmethod
+	def registerChangeListener(listener, module=None, key=None):
 		"""
 			Registers object 'listener' for change notifications.
 			'listener' must provide an 'onDataChanged' function accepting
-			one parameter: the name of the module. Does nothing if that object
-			has already registered.
+			one parameter: the name of the module, and the keyword arguments
+			described in notifyChange. Does nothing if that object
+			has already registered for the same module and key.
 			:param listener: The object to register
 			:type listener: object
+			:param module: Only inform about changes of this module. If None, changes of all modules are reported.
+			:type module: str
+			:param key: Only inform about changes of this entry or of the whole module.
+			:type key: str
 		"""
-		if listener in NetworkService.changeListeners:
+		module = module or "*"
+		key = key or ""
+		lid = id(listener)
+
+		channels = NetworkService._listenerChannels.get(lid)
+		if channels is None:
+			channels = NetworkService._listenerChannels[lid] = []
+
+		if (module, key) in channels:
 			return
 
-		NetworkService.changeListeners.append(listener)
+		channels.append((module, key))
+
+		if not module in NetworkService.changeListeners:
+			NetworkService.changeListeners[module] = {}
+
+		if not key in NetworkService.changeListeners[module]:
+			NetworkService.changeListeners[module][key] = {}
+
+		NetworkService.changeListeners[module][key][lid] = listener
 
 	@staticmethod
 	def removeChangeListener( listener ):
@@ -142,58 +1064,132 @@ class NetworkService( object ):
 			:param listener: The object to unregister. It must be currently registered.
 			:type listener: object
 		"""
-		assert listener in NetworkService.changeListeners, "Attempt to remove unregistered listener %s" % str( listener )
-		NetworkService.changeListeners.remove( listener )
+		lid = id(listener)
+		assert lid in NetworkService._listenerChannels, "Attempt to remove unregistered listener %s" % str( listener )
+
+		for module, key in NetworkService._listenerChannels[lid]:
+			listeners = NetworkService.changeListeners[module]
+			del listeners[key][lid]
+
+			if not listeners[key]:
+				del listeners[key]
+
+			if not listeners:
+				del NetworkService.changeListeners[module]
+
+		del NetworkService._listenerChannels[lid]
+
+	@staticmethod
+	def getChangeListeners(module, keys=None):
+		"""
+			Returns the listeners to be informed about a change of data in 'module'.
+			:param module: Name of the module, or None for all listeners
+			:type module: str
+			:param keys: Keys of the changed entries, or None if the whole module changed
+			:type keys: list
+			:returns: list
+		"""
+		res = {}
+
+		if module:
+			channels = [m for m in ["*", module] if m in NetworkService.changeListeners]
+		else:
+			channels = list(NetworkService.changeListeners.keys())
+
+		for m in channels:
+			listeners = NetworkService.changeListeners[m]
+
+			if keys is None or m == "*":
+				for bucket in listeners.values():
+					res.update(bucket)
+			else:
+				for k in [""] + keys:
+					if k in listeners:
+						res.update(listeners[k])
+
+		return list(res.values())
 
 	@staticmethod
 	def genReqStr( params ):
 		"""
 			Creates a MIME (multipart/mixed) payload for post requests transmitting
 			the values given in params.
+			The parts are collected first and joined once, so the time needed is
+			linear to the size of the payload.
 			:param params: Dictionary of key->values to encode
 			:type params: dict
 			:returns: (string payload, string boundary )
 		"""
-		boundary_str = "---"+''.join( [ random.choice(string.ascii_lowercase+string.ascii_uppercase + string.digits) for x in range(13) ] )
-		boundary = boundary_str
-		res = b'Content-Type: multipart/mixed; boundary="'+boundary+b'"\r\nMIME-Version: 1.0\r\n'
-		res += b'\r\n--'+boundary
+		boundary = "---" + str(int(time.time() * 1000)) + str(random.randint(100000000, 999999999))
+		separator = b'\r\n--' + boundary
+		partHead = b'\r\nContent-Type: application/octet-stream\r\nMIME-Version: 1.0\r\nContent-Disposition: form-data; name="'
+
+		res = [b'Content-Type: multipart/mixed; boundary="' + boundary + b'"\r\nMIME-Version: 1.0\r\n', separator]
+
 		for(key, value) in list(params.items()):
-			if all( [x in dir( value ) for x in ["name", "read"] ] ): #File
+			if isinstance(value, list):
+				for val in value:
+					res.extend([partHead, key, b'"\r\n\r\n', str(val), separator])
+			elif isinstance(value, dict):
+				for k,v in value.items():
+					res.extend([partHead, key, b".", k, b'"\r\n\r\n', str(v), separator])
+			elif hasattr(value, "name") and hasattr(value, "read"): #File
 				try:
 					(type, encoding) = mimetypes.guess_type( value.name.decode( sys.getfilesystemencoding() ), strict=False )
 					type = type or "application/octet-stream"
 				except:
 					type = "application/octet-stream"
-				res += b'\r\nContent-Type: '+type+b'\r\nMIME-Version: 1.0\r\nContent-Disposition: form-data; name="'+key+b'"; filename="'+os.path.basename(value.name).decode(sys.getfilesystemencoding())+b'"\r\n\r\n'
-				res += str(value.read())
-				res += b'\r\n--'+boundary
-			elif isinstance( value, list ):
-				for val in value:
-					res += b'\r\nContent-Type: application/octet-stream\r\nMIME-Version: 1.0\r\nContent-Disposition: form-data; name="'+key+b'"\r\n\r\n'
-					res += str(val)
-					res += b'\r\n--'+boundary
-			elif isinstance( value, dict ):
-				for k,v in value.items():
-					res += b'\r\nContent-Type: application/octet-stream\r\nMIME-Version: 1.0\r\nContent-Disposition: form-data; name="'+key+b"."+k+b'"\r\n\r\n'
-					res += str(v)
-					res += b'\r\n--'+boundary
+				res.extend([b'\r\nContent-Type: ', type, b'\r\nMIME-Version: 1.0\r\nContent-Disposition: form-data; name="', key,
+				            b'"; filename="', os.path.basename(value.name).decode(sys.getfilesystemencoding()), b'"\r\n\r\n',
+				            str(value.read()), separator])
 			else:
-				res += b'\r\nContent-Type: application/octet-stream\r\nMIME-Version: 1.0\r\nContent-Disposition: form-data; name="'+key+b'"\r\n\r\n'
-				res += str(value)
-				res += b'\r\n--'+boundary
-		res += b'--\r\n'
-		return( res, boundary )
+				res.extend([partHead, key, b'"\r\n\r\n', str(value), separator])
+
+		res.append(b'--\r\n')
+		return( b"".join(res), boundary )
+
+	@staticmethod
+	def isFlatParams(params):
+		"""
+			Checks if params only contains plain values, so it can be transmitted
+			url-encoded instead of as multipart payload.
+			:type params: dict
+			:returns: bool
+		"""
+		for value in params.values():
+			if not isinstance(value, (str, int, float, bool)):
+				return False
+
+		return True
+
+	@staticmethod
+	def genUrlEncodedStr(params):
+		"""
+			Creates an application/x-www-form-urlencoded payload from the values
+			given in params, which must be flat (see isFlatParams).
+			:param params: Dictionary of key->values to encode
+			:type params: dict
+			:returns: str
+		"""
+		encode = eval("encodeURIComponent")
+		return "&".join([encode(str(k)) + "=" + encode(str(v)) for k, v in params.items()])
 
 
 	@staticmethod
 	def decode(req):
 		"""
 			Decodes a response received from the server (ie parsing the json)
+			The decoded object is kept with the request, so calling this function
+			repeatedly for the same response parses it only once.
 			:type req: Instance of NetworkService response
 			:returns: object
 		"""
-		return json.loads(req.result)
+		if req.decoded is None:
+			start = time.time()
+			req.decoded = json.loads(req.result)
+			req.decodeTime += (time.time() - start) * 1000
+
+		return req.decoded
 
 	@staticmethod
 	def isOkay(req):
@@ -229,8 +1225,111 @@ class NetworkService( object ):
 
 		return "%s%s_unused_time_stamp=%s" % (path, "&" if "?" in path else "?", cacheKey)
 
+	@staticmethod
+	def genCoalesceKey(module, url, params, modifies, cacheable, secure):
+		"""
+			Returns the key under which identical requests are merged while one of
+			them is running, or None if the request must not be shared.
+			Only read-only GET or cacheable requests are shared; requests modifying
+			data, requiring a security key or fetching one are always sent on their own.
+			:returns: str or None
+		"""
+		if modifies or secure or not (cacheable or not params):
+			return None
+
+		if url.endswith("skey"):
+			return None
+
+		return NetworkCache.genKey(module, url, params)
+
+	@staticmethod
+	def acquireSlot(req):
+		"""
+			Lets 'req' occupy one of the conf["network.maxRequests"] slots for
+			concurrently running requests. If there's no free slot, the request is
+			queued by its priority and sent once a slot becomes available.
+			Interactive requests are never queued.
+			:returns: True if the request can be sent right now.
+		"""
+		if (req.priority > NetworkService.PRIORITY_INTERACTIVE
+				and NetworkService._running >= conf["network.maxRequests"]):
+			if not req.priority in NetworkService._queue.keys():
+				NetworkService._queue[req.priority] = []
+
+			NetworkService._queue[req.priority].append(req)
+			return False
+
+		NetworkService._running += 1
+		req.hasSlot = True
+		return True
+
+	@staticmethod
+	def raisePriority(req, priority):
+		"""
+			Raises the priority of 'req' to 'priority', moving it to the according
+			queue or sending it right away if it is still waiting for a slot.
+		"""
+		if priority >= req.priority:
+			return
+
+		queue = NetworkService._queue.get(req.priority)
+		req.priority = priority
+
+		if queue and req in queue:
+			queue.remove(req)
+
+			if NetworkService.acquireSlot(req):
+				req.send()
+
+	@staticmethod
+	def releaseSlot(req):
+		"""
+			Frees the slot occupied by 'req' and sends the next queued request.
+		"""
+		if not req.hasSlot:
+			return
+
+		req.hasSlot = False
+		NetworkService._running -= 1
+
+		prios = list(NetworkService._queue.keys())
+		prios.sort()
+
+		for p in prios:
+			if NetworkService._queue[p]:
+				nextReq = NetworkService._queue[p].pop(0)
+				NetworkService._running += 1
+				nextReq.hasSlot = True
+				nextReq.send()
+				return
+
+	@staticmethod
+	def getRetryDelay(req):
+		"""
+			Computes the delay in ms before 'req' is retried.
+			The delay grows exponentially with the number of attempts and is
+			jittered, so failed requests don't retry all at the same moment.
+			If the shared retry budget is exhausted, the retry is postponed
+			until the retries scheduled before have been done.
+			:returns: int
+		"""
+		now = time.time() * 1000
+		NetworkService._retries = [t for t in NetworkService._retries if t > now - NetworkService.retryBudgetWindow]
+
+		delay = min(req.retryDelay * (2 ** (req.kickoffs - 1)), NetworkService.retryDelayMax)
+		delay = int(delay / 2 + random.random() * delay / 2)
+
+		if len(NetworkService._retries) >= NetworkService.retryBudget:
+			delay = max(delay, int(max(NetworkService._retries) - now + random.random() * req.retryDelay))
+			NetworkService.retryStats["paused"] += 1
+
+		NetworkService._retries.append(now + delay)
+		NetworkService.retryStats["retries"] += 1
+
+		return delay
+
 	def __init__(self, module, url, params, successHandler, failureHandler, finishedHandler,
-	                modifies, cacheable, secure, kickoff):
+	                modifies, cacheable, secure, kickoff, priority=None):
 		"""
 			Constructs a new NetworkService request.
 			Should not be called directly (use NetworkService.request instead).
@@ -238,8 +1337,14 @@ class NetworkService( object ):
 		super(NetworkService, self).__init__()
 
 		self.result = None
+		self.decoded = None # The decoded result, see decode()
 		self.status = None
 		self.waitingForSkey = False
+		self.pooledSkey = False
+		self.fromCache = False
+		self.coalesceKey = NetworkService.genCoalesceKey(module, url, params, modifies, cacheable, secure)
+		self.leader = None # The request this one is attached to, if coalesced
+		self.followers = [] # Requests attached to this one
 		self.module = module
 		self.url = url
 		self.params = params
@@ -252,23 +1357,82 @@ class NetworkService( object ):
 		self.cacheable = cacheable
 		self.secure = secure
 
+		if priority is None:
+			priority = NetworkService.PRIORITY_INTERACTIVE if (modifies or secure) else NetworkService.PRIORITY_VISIBLE
+
+		self.priority = priority
+		self.hasSlot = False
+		self.retries = 0 # Number of retries done so far
+		self.kickoffAt = None # Time in ms of the first kickoff
+		self.sentAt = None # Time in ms the request left the queue
+		self.firstByteAt = None # Time in ms the response headers arrived
+		self.decodeTime = 0 # Time in ms spent decoding the response
+		self.httpRequest = None # The currently running HTTPRequest, if any
+		self.validator = None # The validator sent with the conditional request, if any
+		self.retryPending = False # True while a failed request waits to be retried
+
 		self.kickoffs = 0
 		if kickoff:
 			self.kickoff()
 
 	def kickoff(self):
+		if self.status == "aborted":
+			return
+
+		self.waitingForSkey = False
+		self.pooledSkey = False
+
+		if self.kickoffAt is None:
+			self.kickoffAt = time.time() * 1000
+
 		self.status = "running"
+		self.retryPending = False
 		self.kickoffs += 1
 
+		if self.coalesceKey and self.kickoffs == 1:
+			NetworkService._inflight[self.coalesceKey] = self
+
+		if self.cacheable and not self.secure:
+			result = NetworkService.cache.get(self.module, self.url, self.params)
+			if result is not None:
+				self.fromCache = True
+				DeferredCall(self.onCompletion, result, _delay=0)
+				return
+
+		if NetworkService.acquireSlot(self):
+			self.send()
+
+	def send(self):
+		"""
+			Performs the request, fetching a security key first if required.
+		"""
+		if self.sentAt is None:
+			self.sentAt = time.time() * 1000
+
 		if self.secure:
-			self.waitingForSkey = True
-			self.doFetch("%s%s/skey" % (NetworkService.host, NetworkService.prefix), None, None)
+			skey = NetworkService.skeys.take()
+
+			if skey:
+				self.pooledSkey = True
+				self.waitingForSkey = False
+				self.doFetch(NetworkService.urlForArgs(self.module, self.url, self.cacheable), self.params, skey)
+			else:
+				self.fetchSkey()
 		else:
 			self.doFetch(NetworkService.urlForArgs(self.module, self.url, self.cacheable), self.params, None)
 
+	def fetchSkey(self):
+		"""
+			Fetches a fresh security key and performs the request afterwards.
+		"""
+		self.pooledSkey = False
+		self.waitingForSkey = True
+		self.doFetch("%s%s/skey" % (NetworkService.host, NetworkService.prefix), None, None)
+
 	@staticmethod
 	def request(module, url, params=None, successHandler=None, failureHandler=None,
-		   finishedHandler=None, modifies=False, cacheable=False, secure=False, kickoff=True):
+		   finishedHandler=None, modifies=False, cacheable=False, secure=False, kickoff=True, priority=None,
+	       retryMax=None, retryDelay=None):
 		"""
 			Performs an AJAX request. Handles caching and security-keys.
 
@@ -291,15 +1455,46 @@ class NetworkService( object ):
 			:type cacheable: bool
 			:param secure: If true, include a fresh securitykey in this request. Defaults to False.
 			:type secure: bool
+			:param priority: One of the NetworkService.PRIORITY_* classes. Defaults to PRIORITY_INTERACTIVE for \
+				requests that modify data or are secure, otherwise to PRIORITY_VISIBLE.
+			:type priority: int
+			:param retryMax: Overrides NetworkService.retryMax for this request.
+			:type retryMax: int
+			:param retryDelay: Overrides NetworkService.retryDelay for this request.
+			:type retryDelay: int
 
 		"""
 		print("NS REQUEST", module, url, params )
 		assert not( cacheable and modifies ), "Cannot cache a request modifying data!"
 
+		coalesceKey = NetworkService.genCoalesceKey(module, url, params, modifies, cacheable, secure)
+		leader = NetworkService._inflight.get(coalesceKey) if coalesceKey and kickoff else None
+
+		if leader:
+			# An identical request is already running, so attach to it
+			req = NetworkService(module, url, params,
+			                        successHandler, failureHandler, finishedHandler,
+			                        modifies, cacheable, secure, False, priority)
+			req.status = "running"
+			req.leader = leader
+			leader.followers.append(req)
+			NetworkService.raisePriority(leader, req.priority)
+			return req
+
 		#Seems not cacheable or not cached
-		return NetworkService(module, url, params,
+		req = NetworkService(module, url, params,
 		                        successHandler, failureHandler, finishedHandler,
-				                    modifies, cacheable, secure, kickoff)
+				                    modifies, cacheable, secure, False, priority)
+
+		if retryMax is not None:
+			req.retryMax = retryMax
+		if retryDelay is not None:
+			req.retryDelay = retryDelay
+
+		if kickoff:
+			req.kickoff()
+
+		return req
 
 	def doFetch(self, url, params, skey):
 		"""
@@ -309,13 +1504,59 @@ class NetworkService( object ):
 		if "updateParams" in conf and conf["updateParams"] and callable(conf["updateParams"]):
 			params = conf["updateParams"](url,params)
 
-		if params:
-			if skey:
+		if skey:
+			if params:
 				params["skey"] = skey
+			elif "?" in url:
+				url += "&skey=%s" % skey
+			else:
+				url += "?skey=%s" % skey
+
+		elif self.cacheable and isinstance(params, dict) and NetworkService.isFlatParams(params):
+			# Send cacheable requests with few parameters as GET, so they can be revalidated
+			query = NetworkService.genUrlEncodedStr(params)
+			if len(url) + len(query) < 2000:
+				url += ("&" if "?" in url else "?") + query
+				params = None
+
+		headers = None
+		self.validator = None
+
+		if not params and not skey and not self.waitingForSkey:
+			self.validator = NetworkService.validators.get(self.module, self.url, self.params)
+
+			if self.validator:
+				headers = {}
 
+				if self.validator["etag"]:
+					headers["If-None-Match"] = self.validator["etag"]
+				if self.validator["modified"]:
+					headers["If-Modified-Since"] = self.validator["modified"]
+
+		if (not skey and not headers and not self.modifies
+				and (params is None or isinstance(params, dict))
+				and RequestBatch.add(url, params, self)):
+			return
+
+		self.httpRequest = NetworkService.transmit(url, params, self, headers)
+
+	@staticmethod
+	def transmit(url, params, cb, headers=None):
+		"""
+			Sends a single AJAX request; as POST if there are params, otherwise as GET.
+			:param cb: Target object to call "onCompletion" or "onError" on
+			:type cb: object
+			:param headers: Additional headers for GET requests
+			:type headers: dict
+			:returns: HTTPRequest
+		"""
+		if params:
 			contentType = None
 
-			if isinstance(params, dict):
+			if isinstance(params, dict) and NetworkService.isFlatParams(params):
+				multipart = NetworkService.genUrlEncodedStr(params)
+				contentType = b"application/x-www-form-urlencoded"
+			elif isinstance(params, dict):
 				multipart, boundary = NetworkService.genReqStr(params)
 				contentType = b"multipart/form-data; boundary=" + boundary + b"; charset=utf-8"
 			elif isinstance(params, bytes):
@@ -326,28 +1567,51 @@ class NetworkService( object ):
 				print(type(params))
 				multipart = params
 
-			HTTPRequest().asyncPost(url, multipart, self, content_type=contentType)
+			req = HTTPRequest()
+			req.asyncPost(url, multipart, cb, content_type=contentType)
 
 		else:
-			if skey:
-				if "?" in url:
-					url += "&skey=%s" % skey
-				else:
-					url += "?skey=%s" % skey
+			req = HTTPRequest()
+			req.asyncGet(url, cb, headers)
 
-			HTTPRequest().asyncGet(url, self)
+		return req
 
 	def onCompletion(self, text):
 		"""
 			Internal hook for the AJAX call.
 		"""
+		if self.status == "aborted":
+			return
+
+		if self.httpRequest:
+			self.firstByteAt = self.httpRequest.firstByteAt
+
+			if not self.waitingForSkey and self.httpRequest.type == "GET":
+				etag = self.httpRequest.getResponseHeader("ETag")
+				modified = self.httpRequest.getResponseHeader("Last-Modified")
+
+				if etag or modified:
+					NetworkService.validators.put(self.module, self.url, self.params,
+					                              {"etag": etag, "modified": modified, "body": text})
+
+			self.httpRequest = None
+
 		if self.waitingForSkey:
 			self.waitingForSkey = False
 			self.doFetch(NetworkService.urlForArgs(self.module, self.url, self.cacheable),
 			                self.params, json.loads(text))
 		else:
+			NetworkService.releaseSlot(self)
 			self.result = text
+			self.decoded = None
 			self.status = "succeeded"
+			followers = self.detachFollowers()
+
+			if self.cacheable and not (self.fromCache or self.leader):
+				NetworkService.cache.put(self.module, self.url, self.params, text)
+			elif self.modifies:
+				NetworkService.cache.invalidate(self.module, self.params.get("key") if self.params else None)
+
 			try:
 				for s in self.successHandler:
 					s( self )
@@ -355,20 +1619,24 @@ class NetworkService( object ):
 					s( self )
 			except:
 				if self.modifies:
-					DeferredCall(
-						NetworkService.notifyChange, self.module,
-						key=self.params.get("key") if self.params else None,
-						action=self.url,
-						_delay=2500
-					)
+					NetworkService.scheduleChange(self.module,
+					                              key=self.params.get("key") if self.params else None,
+					                              action=self.url)
+
+				for follower in followers:
+					follower.onCompletion(text)
+
 				raise
 
+			for follower in followers:
+				follower.onCompletion(text)
+
 			if self.modifies:
-				DeferredCall(
-					NetworkService.notifyChange, self.module,
-					key=self.params.get("key") if self.params else None,
-					action=self.url, _delay=2500
-				)
+				NetworkService.scheduleChange(self.module,
+				                              key=self.params.get("key") if self.params else None,
+				                              action=self.url)
+
+			NetworkStats.record(self, self.status)
 
 			# Remove references to our handlers
 			self.clear()
@@ -377,20 +1645,52 @@ class NetworkService( object ):
 		"""
 			Internal hook for the AJAX call.
 		"""
+		if self.status == "aborted":
+			return
+
+		if int(code) == 304 and self.validator:
+			# Not modified, so the body we know is still valid
+			self.firstByteAt = self.httpRequest.firstByteAt if self.httpRequest else None
+			self.httpRequest = None
+			self.onCompletion(self.validator["body"])
+			return
+
+		self.httpRequest = None
 		self.status = "failed"
 		self.result = text
+		self.decoded = None
+
+		if self.pooledSkey and int(code) == 412:
+			# The prefetched security key wasn't accepted (anymore), so try again with a fresh one
+			NetworkService.skeys.clear()
+			self.status = "running"
+			self.fetchSkey()
+			return
+
+		NetworkService.releaseSlot(self)
 
 		print("onError", self.kickoffs, self.retryMax, int(code), self.retryCodes)
 
-		if self.kickoffs < self.retryMax and int(code) in self.retryCodes:
+		if not self.leader and self.kickoffs < self.retryMax and int(code) in self.retryCodes:
 			logError = eval("window.top.logError")
 			if logError and self.kickoffs == self.retryMax - 1:
 				logError("NetworkService.onError code:%s module:%s url:%s params:%s" % (code, self.module, self.url, self.params))
 
-			print("error %d, kickoff %d, will retry now" % (int(code), self.kickoffs))
-			DeferredCall(self.kickoff, _delay=self.retryDelay)
+			delay = NetworkService.getRetryDelay(self)
+			self.retries += 1
+
+			print("error %d, kickoff %d, will retry in %dms" % (int(code), self.kickoffs, delay))
+			self.retryPending = True
+			DeferredCall(self.kickoff, _delay=delay)
 			return
 
+		if int(code) in self.retryCodes and self.retries:
+			NetworkService.retryStats["exhausted"] += 1
+
+		NetworkStats.record(self, int(code))
+
+		followers = self.detachFollowers()
+
 		for s in self.failureHandler:
 			s(self, code)
 
@@ -403,12 +1703,70 @@ class NetworkService( object ):
 		for s in self.finishedHandler:
 			s(self)
 
+		for follower in followers:
+			follower.onError(text, code)
+
 	def onTimeout(self, text):
 		"""
 			Internal hook for the AJAX call.
 		"""
 		self.onError(text, -1)
 
+	def abort(self):
+		"""
+			Cancels the request if it is still running or waiting to be retried.
+			None of its handlers will be called afterwards. If other identical
+			requests are attached to this one, the transfer continues for them.
+		"""
+		if self.status != "running" and not self.retryPending:
+			return
+
+		if self.leader:
+			if self in self.leader.followers:
+				self.leader.followers.remove(self)
+
+			self.status = "aborted"
+			self.clear()
+			return
+
+		if self.followers:
+			# Keep the transfer alive for the attached requests, just forget our own handlers
+			self.successHandler = []
+			self.failureHandler = []
+			self.finishedHandler = []
+			return
+
+		self.status = "aborted"
+		self.detachFollowers()
+
+		for queue in NetworkService._queue.values():
+			if self in queue:
+				queue.remove(self)
+
+		batch = RequestBatch.current
+		if batch:
+			batch.entries = [x for x in batch.entries if x[2] is not self]
+
+		if self.httpRequest:
+			self.httpRequest.abort()
+			self.httpRequest = None
+
+		NetworkService.releaseSlot(self)
+		self.clear()
+
+	def detachFollowers(self):
+		"""
+			Stops sharing this request with new identical requests and returns
+			the requests attached to it so far.
+			:returns: list
+		"""
+		if self.coalesceKey and NetworkService._inflight.get(self.coalesceKey) is self:
+			del NetworkService._inflight[self.coalesceKey]
+
+		followers = self.followers
+		self.followers = []
+		return followers
+
 	def clear(self):
 		self.successHandler = []
 		self.finishedHandler = []
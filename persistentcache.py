@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+import json, time
+from config import conf
+
+class PersistentCache(object):
+	"""
+		Keeps JSON-serializable values across page loads.
+
+		Values are stored in IndexedDB, or in localStorage if IndexedDB is not
+		available. All entries belong to the Vi version that wrote them; entries
+		written by another version are evicted when the cache is opened.
+		Entries larger than conf["persistentCache.maxEntrySize"] are not stored,
+		and the least recently written entries are evicted when the total size
+		exceeds conf["persistentCache.maxSize"].
+	"""
+	dbName = "vi"
+	storeName = "cache"
+	prefix = "vi.cache." # Key prefix used in localStorage
+
+	def __init__(self):
+		super(PersistentCache, self).__init__()
+		self.version = ".".join([str(x) for x in conf["vi.version"]]) + conf["vi.version.appendix"]
+		self.db = None # IndexedDB database, if available
+		self.storage = None # localStorage, if IndexedDB is not available
+		self.isReady = False
+		self.queue = [] # Operations waiting for the cache to be opened
+		self.index = {} # key->(size, time written) of all entries
+
+		try:
+			idb = eval("window.indexedDB")
+		except:
+			idb = None
+
+		if idb:
+			req = idb.open(self.dbName, 1)
+			req.onupgradeneeded = self.onUpgradeNeeded
+			req.onsuccess = self.onOpened
+			req.onerror = self.onOpenFailed
+		else:
+			self.onOpenFailed()
+
+	def onUpgradeNeeded(self, event):
+		"""
+			Internal callback; creates the object store.
+		"""
+		event.target.result.createObjectStore(self.storeName)
+
+	def onOpened(self, event):
+		"""
+			Internal callback; IndexedDB is available.
+		"""
+		self.db = event.target.result
+		self._read("__version__", self.onVersionAvailable)
+
+	def onOpenFailed(self, *args, **kwargs):
+		"""
+			Internal callback; falls back to localStorage.
+		"""
+		self.db = None
+
+		try:
+			self.storage = eval("window.localStorage")
+		except:
+			self.storage = None
+
+		self._read("__version__", self.onVersionAvailable)
+
+	def onVersionAvailable(self, version):
+		"""
+			Internal callback; evicts the entries of other versions.
+		"""
+		if version != self.version:
+			self._clear()
+			self._write("__version__", self.version)
+			self.onIndexAvailable(None)
+		else:
+			self._read("__index__", self.onIndexAvailable)
+
+	def onIndexAvailable(self, index):
+		"""
+			Internal callback; the cache is ready to use.
+		"""
+		try:
+			self.index = json.loads(index) if index else {}
+		except:
+			self.index = {}
+
+		self.isReady = True
+
+		queue = self.queue
+		self.queue = []
+
+		for op in queue:
+			op()
+
+	def _read(self, key, cb):
+		"""
+			Reads the raw text stored under key and passes it (or None) to cb.
+		"""
+		if self.db:
+			req = self.db.transaction(self.storeName, "readonly").objectStore(self.storeName).get(key)
+			req.onsuccess = lambda *args, **kwargs: cb(req.result or None)
+			req.onerror = lambda *args, **kwargs: cb(None)
+		elif self.storage:
+			cb(self.storage.getItem(self.prefix + key) or None)
+		else:
+			cb(None)
+
+	def _write(self, key, text):
+		"""
+			Stores the raw text under key.
+			:returns: False if the text could not be stored.
+		"""
+		try:
+			if self.db:
+				self.db.transaction(self.storeName, "readwrite").objectStore(self.storeName).put(text, key)
+			elif self.storage:
+				self.storage.setItem(self.prefix + key, text)
+			else:
+				return False
+		except:
+			return False
+
+		return True
+
+	def _delete(self, key):
+		"""
+			Removes the entry stored under key.
+		"""
+		if self.db:
+			self.db.transaction(self.storeName, "readwrite").objectStore(self.storeName)["delete"](key)
+		elif self.storage:
+			self.storage.removeItem(self.prefix + key)
+
+	def _clear(self):
+		"""
+			Removes all entries.
+		"""
+		if self.db:
+			self.db.transaction(self.storeName, "readwrite").objectStore(self.storeName).clear()
+		elif self.storage:
+			for i in range(self.storage.length - 1, -1, -1):
+				key = self.storage.key(i)
+				if key and key.startswith(self.prefix):
+					self.storage.removeItem(key)
+
+		self.index = {}
+
+	def _run(self, op):
+		"""
+			Runs op once the cache is ready.
+		"""
+		if self.isReady:
+			op()
+		else:
+			self.queue.append(op)
+
+	def get(self, key, callback):
+		"""
+			Retrieves the value stored under key.
+			:param callback: Called with the value, or None if there is none.
+			:type callback: callable
+		"""
+		def onRead(text):
+			try:
+				value = json.loads(text) if text else None
+			except:
+				value = None
+
+			callback(value)
+
+		self._run(lambda: self._read(key, onRead))
+
+	def set(self, key, value):
+		"""
+			Stores value under key.
+		"""
+		self._run(lambda: self._set(key, json.dumps(value)))
+
+	def _set(self, key, text):
+		if len(text) > conf["persistentCache.maxEntrySize"]:
+			self._remove(key)
+			return
+
+		self.index[key] = (len(text), time.time())
+
+		# Evict the least recently written entries to keep the size limit
+		total = sum([x[0] for x in self.index.values()])
+		while total > conf["persistentCache.maxSize"]:
+			oldest = None
+			for k, entry in self.index.items():
+				if k != key and (oldest is None or entry[1] < self.index[oldest][1]):
+					oldest = k
+
+			if oldest is None:
+				break
+
+			total -= self.index[oldest][0]
+			self._remove(oldest, saveIndex=False)
+
+		if not self._write(key, text):
+			del self.index[key]
+
+		self._write("__index__", json.dumps(self.index))
+
+	def remove(self, key):
+		"""
+			Removes the value stored under key.
+		"""
+		self._run(lambda: self._remove(key))
+
+	def _remove(self, key, saveIndex=True):
+		if not key in self.index:
+			return
+
+		del self.index[key]
+		self._delete(key)
+
+		if saveIndex:
+			self._write("__index__", json.dumps(self.index))
+
+	def clear(self):
+		"""
+			Removes all values.
+		"""
+		self._run(self._reset)
+
+	def _reset(self):
+		self._clear()
+		self._write("__version__", self.version)
+
+persistentCache = PersistentCache()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+	Measures the payload builder, the scheduler and the request slots of
+	network.py on top of the fake transport of fakebrowser.py.
+
+	Run with Python 2.7 from the repository root:
+
+		python2 tools/bench_network.py
+
+	The payload times are wall-clock times of CPython. CPython extends strings
+	in place on "+=", so the previous builder is much slower under PyJS than
+	shown here; the numbers are meant for comparing changes on one machine.
+	Request timings are measured on the virtual clock with a fixed server latency.
+"""
+import os, sys, random, string, mimetypes, timeit
+from fakebrowser import Browser, FakeServer, out
+
+browser = Browser()
+network = browser.network
+NetworkService = network.NetworkService
+DeferredCall = network.DeferredCall
+
+
+def legacyGenReqStr( params ):
+	"""
+		The payload builder of NetworkService before it collected the parts.
+	"""
+	boundary_str = "---"+''.join( [ random.choice(string.ascii_lowercase+string.ascii_uppercase + string.digits) for x in range(13) ] )
+	boundary = boundary_str
+	res = b'Content-Type: multipart/mixed; boundary="'+boundary+b'"\r\nMIME-Version: 1.0\r\n'
+	res += b'\r\n--'+boundary
+	for(key, value) in list(params.items()):
+		if all( [x in dir( value ) for x in ["name", "read"] ] ): #File
+			try:
+				(type, encoding) = mimetypes.guess_type( value.name.decode( sys.getfilesystemencoding() ), strict=False )
+				type = type or "application/octet-stream"
+			except:
+				type = "application/octet-stream"
+			res += b'\r\nContent-Type: '+type+b'\r\nMIME-Version: 1.0\r\nContent-Disposition: form-data; name="'+key+b'"; filename="'+os.path.basename(value.name).decode(sys.getfilesystemencoding())+b'"\r\n\r\n'
+			res += str(value.read())
+			res += b'\r\n--'+boundary
+		elif isinstance( value, list ):
+			for val in value:
+				res += b'\r\nContent-Type: application/octet-stream\r\nMIME-Version: 1.0\r\nContent-Disposition: form-data; name="'+key+b'"\r\n\r\n'
+				res += str(val)
+				res += b'\r\n--'+boundary
+		elif isinstance( value, dict ):
+			for k,v in value.items():
+				res += b'\r\nContent-Type: application/octet-stream\r\nMIME-Version: 1.0\r\nContent-Disposition: form-data; name="'+key+b"."+k+b'"\r\n\r\n'
+				res += str(v)
+				res += b'\r\n--'+boundary
+		else:
+			res += b'\r\nContent-Type: application/octet-stream\r\nMIME-Version: 1.0\r\nContent-Disposition: form-data; name="'+key+b'"\r\n\r\n'
+			res += str(value)
+			res += b'\r\n--'+boundary
+	res += b'--\r\n'
+	return( res, boundary )
+
+
+def genForms():
+	"""
+		Returns (name, params) of some large edit forms.
+	"""
+	html = "<p>" + ("Lorem ipsum dolor sit amet, consectetur adipisici elit. " * 40) + "</p>"
+
+	return [
+		("200 text bones", dict([("text%d" % i, html) for i in range(0, 200)])),
+		("record bone, 2000 fields", {"name": "Test", "record": dict([("field%d" % i, i) for i in range(0, 2000)])}),
+		("multiple bone, 5000 values", {"name": "Test", "tags": ["tag%d" % i for i in range(0, 5000)]}),
+		("3000 short bones", dict([("bone%d" % i, "value%d" % i) for i in range(0, 3000)])),
+	]
+
+
+def timeCall(func, *args):
+	"""
+		Returns the best time in ms of several runs of func(*args).
+	"""
+	return min(timeit.repeat(lambda: func(*args), number=3, repeat=5)) / 3 * 1000
+
+
+def benchPayloads():
+	out.write("Payload builder (ms per payload, best of 5)\n")
+	out.write("%-30s %10s %10s %10s\n" % ("form", "legacy", "current", "size KB"))
+
+	for name, params in genForms():
+		legacy = timeCall(legacyGenReqStr, params)
+		current = timeCall(NetworkService.genReqStr, params)
+		size = len(NetworkService.genReqStr(params)[0]) / 1024
+
+		out.write("%-30s %10.2f %10.2f %10d\n" % (name, legacy, current, size))
+
+	out.write("\n")
+
+
+def benchScheduler():
+	out.write("Scheduler\n")
+
+	for count in [500, 2000]:
+		browser.reset()
+		window = browser.window
+		armed = window.seq
+		calls = []
+
+		start = timeit.default_timer()
+		for i in range(0, count):
+			DeferredCall(calls.append, i)
+		scheduled = (timeit.default_timer() - start) * 1000
+
+		browser.run()
+
+		out.write("%5d timers: %8.2f ms to schedule, %d browser timer(s) armed, %d run\n"
+		          % (count, scheduled, window.seq - armed, len(calls)))
+
+	out.write("\n")
+
+
+def benchSlots():
+	out.write("Request slots (virtual time, server latency 50 ms)\n")
+
+	for maxRequests, count in [(4, 40), (8, 40)]:
+		server = FakeServer(latency=50)
+		server.routes["/page/view"] = lambda params, headers: '{"values": {}}'
+		browser.reset(server, **{"network.maxRequests": maxRequests})
+		burst = browser.window.now
+
+		reqs = [browser.request("page", "view", {"key": "k%d" % i}, cacheable=True,
+		                        priority=NetworkService.PRIORITY_PREFETCH) for i in range(0, count)]
+
+		# A user action in the middle of the burst
+		browser.run(until=browser.window.now + 75)
+		start = browser.window.now
+		interactive = browser.request("page", "view", {"key": "interactive"}, cacheable=True,
+		                              priority=NetworkService.PRIORITY_INTERACTIVE)
+		browser.run()
+
+		waits = [req.sentAt - req.kickoffAt for req in reqs]
+		out.write("%2d requests, maxRequests %d: %3d concurrent at most, queue wait avg %6.1f ms max %6.1f ms, "
+		          "all done after %4d ms, interactive waited %d ms\n"
+		          % (count, maxRequests, server.maxRunning, sum(waits) / len(waits), max(waits),
+		             browser.window.now - burst, interactive.sentAt - start))
+
+	server = FakeServer(latency=50)
+	server.routes["/page/view"] = lambda params, headers: '{"values": {}}'
+	browser.reset(server)
+
+	for i in range(0, 20):
+		browser.request("page", "view", {"key": "same"}, cacheable=True)
+
+	browser.run()
+	out.write("20 identical requests: %d sent to the server\n" % len(server.requests))
+	out.write("\n")
+
+
+benchPayloads()
+benchScheduler()
+benchSlots()
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+	Checks request batching (RequestBatch) and the multipart payloads created by
+	NetworkService.genReqStr() against the fake transport of fakebrowser.py.
+
+	Run with Python 2.7 from the repository root:
+
+		python2 tools/check_batching.py
+"""
+import json
+from fakebrowser import Browser, FakeServer, Recorder, check, finish
+
+BATCH_URL = "/vi/batch"
+
+browser = Browser()
+network = browser.network
+
+
+def listRoute(params, headers):
+	return json.dumps({"action": "list", "skellist": [], "params": params})
+
+def brokenRoute(params, headers):
+	return 404, json.dumps("Not found"), {}
+
+def setup(**conf):
+	server = FakeServer()
+	server.routes["/user/list"] = listRoute
+	server.routes["/file/list"] = listRoute
+	server.routes["/page/list"] = listRoute
+	server.routes["/broken/list"] = brokenRoute
+	server.routes["/page/edit"] = listRoute
+
+	for i in range(0, 3):
+		server.routes["/user%d/list" % i] = listRoute
+
+	browser.reset(server, **conf)
+	return server, Recorder(network)
+
+def issue(recorder, names, **kwargs):
+	"""
+		Issues one cacheable list request per module name within the same tick.
+	"""
+	return [browser.request(name, "list", {"amount": 5, "name": name},
+	                        successHandler=recorder.success(name),
+	                        failureHandler=recorder.failure(name),
+	                        cacheable=True, **kwargs) for name in names]
+
+def batches(server):
+	return [xhr for xhr in server.requests if xhr.url == BATCH_URL]
+
+
+# Without a batch endpoint, every request is sent on its own
+server, recorder = setup()
+issue(recorder, ["user", "file", "page"])
+browser.run()
+
+check(len(server.requests) == 3, "without network.batch.url, 3 requests are sent individually")
+check(all([recorder.results.get(x, ("",))[0] == "ok" for x in ["user", "file", "page"]]),
+      "without network.batch.url, all requests succeed")
+
+
+# Requests issued within one tick are sent in one batch
+server, recorder = setup(**{"network.batch.url": BATCH_URL})
+issue(recorder, ["user", "file", "page"])
+browser.run()
+
+check(len(server.requests) == 1 and len(batches(server)) == 1, "3 requests are sent as one batch")
+
+entries = json.loads(batches(server)[0].payload) if batches(server) else []
+check([e["url"].split("?")[0] for e in entries] == ["/json/user/list", "/json/file/list", "/json/page/list"],
+      "the batch contains the requests in the order they were issued")
+check(batches(server) and batches(server)[0].requestHeaders.get("Content-Type") == "application/json",
+      "the batch is posted as application/json")
+
+check([recorder.results.get(x, ("",))[0] for x in ["user", "file", "page"]] == ["ok", "ok", "ok"],
+      "each request of the batch succeeds")
+check(all([recorder.results[x][1]["params"]["name"] == x for x in ["user", "file", "page"] if x in recorder.results]),
+      "each request receives its own answer from the batch")
+check(network.NetworkService._running == 0, "no slot stays occupied after the batch")
+
+
+# Answers with an error status are dispatched to the failure handler of their request only
+server, recorder = setup(**{"network.batch.url": BATCH_URL})
+issue(recorder, ["user", "broken", "page"])
+browser.run()
+
+check(len(batches(server)) == 1, "a batch with a failing request is sent once")
+check(recorder.results.get("broken") == ("failed", 404), "the failing request receives its error code")
+check(recorder.results.get("user", ("",))[0] == "ok" and recorder.results.get("page", ("",))[0] == "ok",
+      "the other requests of the batch succeed")
+
+
+# A single request isn't wrapped into a batch
+server, recorder = setup(**{"network.batch.url": BATCH_URL})
+issue(recorder, ["user"])
+browser.run()
+
+check(len(server.requests) == 1 and not batches(server), "a single request is sent on its own")
+check(recorder.results.get("user", ("",))[0] == "ok", "the single request succeeds")
+
+
+# The batch is split once network.batch.size is reached
+server, recorder = setup(**{"network.batch.url": BATCH_URL, "network.batch.size": 4})
+names = ["user", "file", "page"] + ["user%d" % i for i in range(0, 3)]
+issue(recorder, names)
+browser.run()
+
+check([len(json.loads(xhr.payload)) for xhr in batches(server)] == [4, 2],
+      "6 requests with network.batch.size 4 are sent as batches of 4 and 2")
+check(all([recorder.results.get(x, ("",))[0] == "ok" for x in names]), "all requests of both batches succeed")
+
+
+# Concurrency limits don't split the batch; it occupies only one slot
+server, recorder = setup(**{"network.batch.url": BATCH_URL, "network.maxRequests": 2})
+issue(recorder, names)
+browser.run()
+
+check(len(batches(server)) == 1 and len(json.loads(batches(server)[0].payload)) == 6,
+      "6 requests with network.maxRequests 2 are sent as one batch")
+check(server.maxRunning == 1, "the batch occupies one slot")
+check(all([recorder.results.get(x, ("",))[0] == "ok" for x in names]), "all requests of the batch succeed")
+
+
+# Requests modifying data are never batched
+server, recorder = setup(**{"network.batch.url": BATCH_URL})
+issue(recorder, ["user", "file"])
+browser.request("page", "edit", {"key": "abc", "name": "Test"}, modifies=True,
+                successHandler=recorder.success("edit"), failureHandler=recorder.failure("edit"))
+browser.run()
+
+check(len(batches(server)) == 1 and len(json.loads(batches(server)[0].payload)) == 2,
+      "only the read-only requests are batched")
+check(recorder.results.get("edit", ("",))[0] == "ok", "the modifying request succeeds on its own")
+
+
+# Aborted requests are removed from the batch
+server, recorder = setup(**{"network.batch.url": BATCH_URL})
+reqs = issue(recorder, ["user", "file", "page"])
+reqs[1].abort()
+browser.run()
+
+check(len(batches(server)) == 1 and len(json.loads(batches(server)[0].payload)) == 2,
+      "an aborted request is removed from the batch")
+check(not "file" in recorder.results, "the handlers of the aborted request aren't called")
+
+server, recorder = setup(**{"network.batch.url": BATCH_URL})
+for req in issue(recorder, ["user", "file"]):
+	req.abort()
+
+browser.run()
+
+check(not server.requests, "a batch of aborted requests isn't sent at all")
+check(network.NetworkService._running == 0, "no slot stays occupied by the empty batch")
+
+
+# If the server rejects the batch endpoint, batching is disabled and the requests are sent individually
+server, recorder = setup(**{"network.batch.url": BATCH_URL})
+server.batchSupported = False
+issue(recorder, ["user", "file", "page"])
+browser.run()
+
+check(len(batches(server)) == 1 and len(server.requests) == 4,
+      "after the batch endpoint failed, the 3 requests are sent individually")
+check(all([recorder.results.get(x, ("",))[0] == "ok" for x in ["user", "file", "page"]]),
+      "the individually sent requests succeed")
+check(not network.RequestBatch.supported, "batching is disabled afterwards")
+check(network.NetworkService._running == 0, "no slot stays occupied after the fallback")
+
+
+# The same applies to a malformed answer of the batch endpoint
+server, recorder = setup(**{"network.batch.url": BATCH_URL})
+answer = server.answer
+server.answer = lambda xhr: (200, "[]", {}) if xhr.url == BATCH_URL else answer(xhr)
+issue(recorder, ["user", "file"])
+browser.run()
+
+check(len(server.requests) == 3, "after a malformed batch answer, the 2 requests are sent individually")
+check(all([recorder.results.get(x, ("",))[0] == "ok" for x in ["user", "file"]]),
+      "the individually sent requests succeed")
+
+
+# Payloads which can't be url-encoded are sent as multipart
+def parseMultipart(payload, boundary):
+	"""
+		Returns a list of (name, value) of the parts in payload.
+	"""
+	res = []
+
+	for part in payload.split("\r\n--" + boundary)[1:]:
+		if part == "--\r\n":
+			break
+
+		head, value = part.split("\r\n\r\n", 1)
+		name = head.split('name="', 1)[1].split('"', 1)[0]
+		res.append((name, value))
+
+	return res
+
+params = {"name": "Test", "tags": ["a", "b", "c"], "price": {"amount": 12, "currency": "EUR"}, "count": 3}
+payload, boundary = network.NetworkService.genReqStr(params)
+parts = parseMultipart(payload, boundary)
+
+check(payload.startswith('Content-Type: multipart/mixed; boundary="%s"' % boundary), "the payload starts with its header")
+check(payload.endswith("\r\n--" + boundary + "--\r\n"), "the payload ends with the closing boundary")
+check(sorted(parts) == sorted([("name", "Test"), ("tags", "a"), ("tags", "b"), ("tags", "c"),
+                               ("price.amount", "12"), ("price.currency", "EUR"), ("count", "3")]),
+      "lists and dicts are sent as one part per value")
+
+server, recorder = setup()
+browser.request("page", "edit", params, modifies=True,
+                successHandler=recorder.success("edit"), failureHandler=recorder.failure("edit"))
+browser.run()
+
+xhr = server.requests[0] if server.requests else None
+check(xhr and xhr.requestHeaders.get("Content-Type", "").startswith("multipart/form-data; boundary="),
+      "a request with nested params is posted as multipart/form-data")
+check(xhr and sorted(parseMultipart(xhr.payload, xhr.requestHeaders["Content-Type"].split("boundary=")[1].split(";")[0]))
+      == sorted([("name", "Test"), ("tags", "a"), ("tags", "b"), ("tags", "c"),
+                 ("price.amount", "12"), ("price.currency", "EUR"), ("count", "3")]),
+      "the posted payload contains all parts")
+
+finish()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+	Checks conditional requests: responses carrying an ETag or Last-Modified
+	header are revalidated with If-None-Match or If-Modified-Since, and a
+	"304 Not Modified" answer replays the known body and refreshes the
+	response cache (NetworkCache).
+
+	Run with Python 2.7 from the repository root:
+
+		python2 tools/check_validators.py
+"""
+import json
+from fakebrowser import Browser, FakeServer, Recorder, check, finish
+
+browser = Browser()
+network = browser.network
+NetworkService = network.NetworkService
+
+
+class Entity(object):
+	"""
+		A server-side entry, answering with 304 if the client already knows its version.
+	"""
+	def __init__(self, name, useEtag=True):
+		super(Entity, self).__init__()
+		self.name = name
+		self.version = 1
+		self.useEtag = useEtag
+		self.answered = [] # Status codes answered so far
+
+	def body(self):
+		return json.dumps({"action": "view", "values": {"key": "abc", "name": self.name, "version": self.version}})
+
+	def route(self, params, headers):
+		if self.useEtag:
+			validator = '"v%d"' % self.version
+			known = headers.get("If-None-Match")
+			responseHeaders = {"ETag": validator}
+		else:
+			validator = "Mon, 0%d Jan 2024 00:00:00 GMT" % self.version
+			known = headers.get("If-Modified-Since")
+			responseHeaders = {"Last-Modified": validator}
+
+		if known == validator:
+			self.answered.append(304)
+			return 304, "", responseHeaders
+
+		self.answered.append(200)
+		return 200, self.body(), responseHeaders
+
+
+def setup(useEtag=True, **conf):
+	entity = Entity("Test", useEtag)
+	server = FakeServer()
+	server.routes["/page/view"] = entity.route
+	browser.reset(server, **conf)
+
+	return server, entity, Recorder(network)
+
+def view(recorder, name):
+	browser.request("page", "view", {"key": "abc"}, cacheable=True,
+	                successHandler=recorder.success(name), failureHandler=recorder.failure(name))
+	browser.run()
+
+def expireCache():
+	browser.run(until=browser.window.now + (browser.conf["network.cache.ttl"] + 1) * 1000)
+
+
+for useEtag in [True, False]:
+	header = "If-None-Match" if useEtag else "If-Modified-Since"
+	server, entity, recorder = setup(useEtag)
+
+	view(recorder, "first")
+	check(entity.answered == [200], "%s: the first request is answered in full" % header)
+	check(not header in server.requests[0].requestHeaders, "%s: the first request is unconditional" % header)
+	check(recorder.results.get("first", ("",))[0] == "ok" and recorder.results["first"][1]["values"]["version"] == 1,
+	      "%s: the first request receives the entry" % header)
+
+	view(recorder, "cached")
+	check(len(server.requests) == 1 and recorder.results.get("cached") == recorder.results.get("first"),
+	      "%s: a repeated request is answered from the response cache" % header)
+
+	# Once the cached response expired, the request is revalidated
+	expireCache()
+	view(recorder, "revalidated")
+	check(entity.answered == [200, 304], "%s: the expired request is answered with 304" % header)
+	check(server.requests[-1].requestHeaders.get(header), "%s: the expired request is conditional" % header)
+	check(recorder.results.get("revalidated") == recorder.results.get("first"),
+	      "%s: the body known from the first request is replayed on 304" % header)
+	check(NetworkService.cache.get("page", "view", {"key": "abc"}) == entity.body(),
+	      "%s: the replayed body is stored in the response cache again" % header)
+
+	view(recorder, "recached")
+	check(len(server.requests) == 2 and recorder.results.get("recached") == recorder.results.get("first"),
+	      "%s: after the 304, the request is answered from the response cache again" % header)
+
+	# A change on the server results in a full answer, which replaces the validator
+	entity.version = 2
+	expireCache()
+	view(recorder, "changed")
+	check(entity.answered == [200, 304, 200], "%s: a changed entry is answered in full" % header)
+	check(recorder.results.get("changed", ("",))[0] == "ok" and recorder.results["changed"][1]["values"]["version"] == 2,
+	      "%s: the changed entry is received" % header)
+
+	expireCache()
+	view(recorder, "again")
+	check(entity.answered == [200, 304, 200, 304], "%s: the new validator is used afterwards" % header)
+	check(recorder.results.get("again") == recorder.results.get("changed"),
+	      "%s: the changed body is replayed on 304" % header)
+
+
+# Changes made by the client drop the cached response, but keep the validator
+server, entity, recorder = setup()
+view(recorder, "first")
+NetworkService.notifyChange("page", key="abc")
+view(recorder, "afterChange")
+check(entity.answered == [200, 304], "after a change notification, the request is revalidated")
+check(recorder.results.get("afterChange") == recorder.results.get("first"), "the known body is replayed")
+
+
+# Conditional requests are never batched, as a batch can't carry their headers
+server, entity, recorder = setup(**{"network.batch.url": "/vi/batch"})
+server.routes["/page/list"] = lambda params, headers: json.dumps({"action": "list", "skellist": []})
+view(recorder, "first")
+expireCache()
+
+browser.request("page", "list", {"amount": 5}, cacheable=True)
+browser.request("page", "list", {"amount": 10}, cacheable=True)
+view(recorder, "revalidated")
+
+check(entity.answered == [200, 304], "with batching enabled, the expired request is answered with 304")
+check([xhr.url for xhr in server.requests].count("/vi/batch") == 1
+      and len(json.loads([xhr for xhr in server.requests if xhr.url == "/vi/batch"][0].payload)) == 2,
+      "the conditional request is sent beside the batch")
+check(recorder.results.get("revalidated") == recorder.results.get("first"), "the known body is replayed")
+
+
+# A 304 without a known validator is an error
+server, entity, recorder = setup()
+server.routes["/page/view"] = lambda params, headers: (304, "", {})
+view(recorder, "unknown")
+check(recorder.results.get("unknown") == ("failed", 304), "a 304 for an unconditional request fails")
+
+finish()
@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+	Loads network.py outside the browser, for the scripts in this directory.
+
+	Provides a fake window with a virtual clock and timers, and an XMLHttpRequest
+	answered by a FakeServer standing in for the ViUR server. config.py is loaded
+	with stand-ins for i18n and logics, which need a browser or are not part of
+	this repository.
+
+	Run the scripts with Python 2.7, which matches the semantics of PyJS, e.g.:
+
+		python2 tools/check_batching.py
+"""
+import os, sys, json, types, urllib, urlparse
+from StringIO import StringIO
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+out = sys.stdout # The network code prints a lot; scripts report on the original stdout
+failures = []
+
+
+class Window(object):
+	"""
+		The parts of window used by network.py, driven by a virtual clock in ms.
+	"""
+	IntersectionObserver = None
+	logError = None
+	innerHeight = 800
+
+	def __init__(self):
+		super(Window, self).__init__()
+		self.top = self
+		self.now = 0.0
+		self.micro = [] # Pending microtasks
+		self.tasks = [] # Pending (due, sequence, func, args)
+		self.seq = 0
+
+	def setTimeout(self, func, delay=0, *args):
+		self.seq += 1
+		self.tasks.append((self.now + max(0, delay or 0), self.seq, func, args))
+		return self.seq
+
+	def queueMicrotask(self, func):
+		self.micro.append(func)
+
+	def requestAnimationFrame(self, func):
+		return self.setTimeout(func, 16, self.now + 16)
+
+	def requestIdleCallback(self, func, options=None):
+		return self.setTimeout(func, 0)
+
+	def run(self, until=None):
+		"""
+			Runs microtasks and timers in order, advancing the clock, until there is
+			nothing left to do or the clock would pass 'until'.
+		"""
+		while True:
+			while self.micro:
+				self.micro.pop(0)()
+
+			if not self.tasks:
+				if until is not None:
+					self.now = max(self.now, until)
+
+				return
+
+			self.tasks.sort()
+			due, seq, func, args = self.tasks[0]
+
+			if until is not None and due > until:
+				self.now = until
+				return
+
+			self.tasks.pop(0)
+			self.now = max(self.now, due)
+			func(*args)
+
+
+class FakeTime(object):
+	"""
+		Replaces the time module in network.py by the virtual clock.
+	"""
+	def __init__(self, window):
+		super(FakeTime, self).__init__()
+		self.window = window
+
+	def time(self):
+		return self.window.now / 1000.0
+
+
+class FakeXMLHttpRequest(object):
+	"""
+		An XMLHttpRequest answered by the FakeServer after its latency.
+	"""
+	def __init__(self, window, server):
+		super(FakeXMLHttpRequest, self).__init__()
+		self.window = window
+		self.server = server
+		self.readyState = 0
+		self.status = 0
+		self.responseText = ""
+		self.onreadystatechange = None
+		self.requestHeaders = {}
+		self.responseHeaders = {}
+		self.aborted = False
+
+	def setState(self, state):
+		self.readyState = state
+		if self.onreadystatechange:
+			self.onreadystatechange()
+
+	def open(self, method, url, isAsync=True):
+		self.method = method
+		self.url = url
+		self.setState(1)
+
+	def setRequestHeader(self, name, value):
+		self.requestHeaders[name] = value
+
+	def send(self, payload=None):
+		self.payload = payload
+		self.server.received(self)
+		self.window.setTimeout(self.respond, self.server.latency)
+
+	def respond(self):
+		if self.aborted:
+			return
+
+		self.status, self.responseText, self.responseHeaders = self.server.answer(self)
+		self.setState(2)
+		self.setState(4)
+
+	def abort(self):
+		self.aborted = True
+
+	def getResponseHeader(self, name):
+		return self.responseHeaders.get(name)
+
+
+class FakeServer(object):
+	"""
+		Stands in for the ViUR server.
+
+		Routes map a path (without the "/json" prefix and query) to a function
+		taking the request parameters and the request headers, and returning
+		(status, body, response headers), or just the body with status 200.
+		The batch endpoint conf["network.batch.url"] is answered by running
+		the routes for all contained requests.
+	"""
+	def __init__(self, latency=50):
+		super(FakeServer, self).__init__()
+		self.latency = latency # Time in ms until a request is answered
+		self.routes = {}
+		self.requests = [] # All requests received, as FakeXMLHttpRequest
+		self.running = 0 # Number of requests currently being answered
+		self.maxRunning = 0 # Maximum number of requests answered concurrently
+		self.batchSupported = True
+
+	def received(self, xhr):
+		self.requests.append(xhr)
+		self.running += 1
+		self.maxRunning = max(self.maxRunning, self.running)
+
+	def answer(self, xhr):
+		self.running -= 1
+		conf = sys.modules["config"].conf
+
+		if conf["network.batch.url"] and xhr.url == conf["network.batch.url"]:
+			if not self.batchSupported:
+				return 404, "Not found", {}
+
+			answers = []
+			for entry in json.loads(xhr.payload):
+				status, body, headers = self.route(entry["url"], entry["params"] or {}, {})
+				answers.append({"status": status, "body": body})
+
+			return 200, json.dumps(answers), {}
+
+		params = {}
+		if xhr.payload and not xhr.payload.startswith("Content-Type: multipart"):
+			params = dict(urlparse.parse_qsl(xhr.payload))
+
+		return self.route(xhr.url, params, xhr.requestHeaders)
+
+	def route(self, url, params, headers):
+		url = urlparse.urlparse(url)
+		params = dict(params)
+		params.update(dict(urlparse.parse_qsl(url.query)))
+		params.pop("_unused_time_stamp", None)
+
+		path = url.path
+		if path.startswith("/json/"):
+			path = path[5:]
+
+		if path.endswith("/skey"):
+			return 200, json.dumps("skey%d" % len(self.requests)), {}
+
+		func = self.routes.get(path)
+		if func is None:
+			return 404, json.dumps("Not found"), {}
+
+		res = func(params, headers)
+		if not isinstance(res, tuple):
+			res = (200, res, {})
+
+		return res
+
+
+def loadConfig(window):
+	"""
+		Loads config.py with stand-ins for the modules requiring a browser.
+	"""
+	i18n = types.ModuleType("i18n")
+	i18n.translate = lambda s, **kwargs: s
+	sys.modules["i18n"] = i18n
+
+	logics = types.ModuleType("logics")
+	logics.Interpreter = object
+	sys.modules["logics"] = logics
+
+	config = types.ModuleType("config")
+	config.eval = lambda expr: "" # window.top.location.hash
+	sys.modules["config"] = config
+
+	path = os.path.join(root, "config.py")
+	exec(compile(open(path).read(), path, "exec"), config.__dict__)
+
+
+class Browser(object):
+	"""
+		Imports network.py on top of a fake window and a FakeServer.
+		Only one browser exists per process, as network.py keeps its state in classes.
+	"""
+	def __init__(self, server=None):
+		super(Browser, self).__init__()
+		self.window = Window()
+		self.server = server or FakeServer()
+
+		if not root in sys.path:
+			sys.path.insert(0, root)
+
+		stdout = sys.stdout
+		sys.stdout = StringIO()
+
+		try:
+			loadConfig(self.window)
+			import network
+		finally:
+			sys.stdout = stdout
+
+		network.eval = self.eval
+		network.time = FakeTime(self.window)
+
+		self.network = network
+		self.conf = sys.modules["config"].conf
+		self.defaults = dict(self.conf)
+
+	def eval(self, expr):
+		if expr in ["window", "window.top"]:
+			return self.window
+		elif expr == "new XMLHttpRequest()":
+			return FakeXMLHttpRequest(self.window, self.server)
+		elif expr == "encodeURIComponent":
+			return lambda s: urllib.quote(s, safe="~()*!.'")
+		elif expr == "window.top.logError":
+			return None
+
+		raise ValueError("Unexpected eval(%r)" % expr)
+
+	def reset(self, server=None, **conf):
+		"""
+			Drops all state kept by network.py and sets the given config values.
+		"""
+		NetworkService = self.network.NetworkService
+		Scheduler = self.network.Scheduler
+
+		self.run()
+
+		self.conf.clear()
+		self.conf.update(self.defaults)
+		self.conf.update(conf)
+
+		self.server = server or FakeServer()
+
+		Scheduler.queues = {"micro": [], "frame": [], "idle": [], "timer": []}
+		Scheduler.pending = {"micro": {}, "frame": {}, "idle": {}, "timer": {}}
+		Scheduler.scheduled = {"micro": False, "frame": False, "idle": False}
+		Scheduler.timerDue = None
+
+		NetworkService.cache.clear()
+		NetworkService.validators.clear()
+		NetworkService.structures.clear()
+		NetworkService.skeys = self.network.SecurityKeyPool()
+		NetworkService._inflight = {}
+		NetworkService._queue = {}
+		NetworkService._running = 0
+		NetworkService._retries = []
+		NetworkService._pendingChanges = {}
+		NetworkService.changeListeners = {}
+		NetworkService._listenerChannels = {}
+
+		self.network.RequestBatch.supported = True
+		self.network.RequestBatch.current = None
+		self.network.NetworkStats.entries = []
+		self.network.NetworkStats.nextIdx = 0
+
+	def run(self, until=None):
+		"""
+			Runs all pending work, with the output of the network code suppressed.
+		"""
+		stdout = sys.stdout
+		sys.stdout = StringIO()
+
+		try:
+			self.window.run(until)
+		finally:
+			sys.stdout = stdout
+
+	def request(self, *args, **kwargs):
+		"""
+			Calls NetworkService.request(), with its output suppressed.
+		"""
+		stdout = sys.stdout
+		sys.stdout = StringIO()
+
+		try:
+			return self.network.NetworkService.request(*args, **kwargs)
+		finally:
+			sys.stdout = stdout
+
+
+class Recorder(object):
+	"""
+		Collects the results passed to the handlers of requests.
+	"""
+	def __init__(self, network):
+		super(Recorder, self).__init__()
+		self.network = network
+		self.results = {}
+
+	def success(self, name):
+		def handler(req):
+			self.results[name] = ("ok", self.network.NetworkService.decode(req))
+
+		return handler
+
+	def failure(self, name):
+		def handler(req, code):
+			self.results[name] = ("failed", int(code))
+
+		return handler
+
+
+def check(condition, message):
+	"""
+		Reports a single check.
+	"""
+	out.write("%s %s\n" % ("ok  " if condition else "FAIL", message))
+
+	if not condition:
+		failures.append(message)
+
+
+def finish():
+	"""
+		Reports the result of all checks and exits accordingly.
+	"""
+	if failures:
+		out.write("\n%d check(s) failed\n" % len(failures))
+		sys.exit(1)
+
+	out.write("\nall checks passed\n")
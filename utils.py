@@ -28,14 +28,186 @@ def formatString(format, data, structure = None, prefix = None, language = None,
 	:rtype: str
 	"""
 
-	#if _rec == 0:
-	#	print("--- formatString ---")
-	#	print(format)
-	#	print(data)
-	#	print(structure)
-	#	print(prefix)
-	#	print(language)
+	return compileFormat(format).apply(data, structure, prefix or [], language)
 
+class _LegacyFormat(Exception):
+	"""
+	Raised by FormatTemplate if the data must be formatted by _formatStringLegacy().
+	"""
+	pass
+
+class FormatTemplate(object):
+	"""
+	A format string parsed for formatString() into literal and placeholder segments.
+
+	Applying it evaluates only the placeholders contained, instead of walking all keys
+	of the data. Lists of (key, value) pairs found in structures are converted to
+	dicts once per structure object and reused as long as the same object is passed.
+	"""
+
+	def __init__(self, format):
+		super(FormatTemplate, self).__init__()
+		self.format = format
+		self.segments = [] # Literal strings and (path, text) tuples for placeholders
+		self.names = {} # Names of all placeholders contained
+		self.dicts = {} # Cached dict conversions, as name -> (original object, dict)
+
+		pos = 0
+		while True:
+			start = format.find("$(", pos)
+			if start < 0:
+				break
+
+			end = format.find(")", start + 2)
+			if end < 0:
+				break
+
+			# Use the innermost placeholder, in case of nested parentheses
+			inner = format.rfind("$(", start, end)
+			if inner > start:
+				start = inner
+
+			if start > pos:
+				self.segments.append(format[pos:start])
+
+			name = format[start + 2:end]
+			self.segments.append((name.split("."), format[start:end + 1]))
+			self.names[name] = True
+			pos = end + 1
+
+		if pos < len(format):
+			self.segments.append(format[pos:])
+
+	def asDict(self, slot, value):
+		"""
+		Returns value converted from a list of (key, value) pairs to a dict,
+		reusing the result of the last conversion in slot for the same object.
+		"""
+		if not isinstance(value, list):
+			return value
+
+		cached = self.dicts.get(slot)
+		if cached and cached[0] is value:
+			return cached[1]
+
+		res = {k: v for k, v in value}
+		self.dicts[slot] = (value, res)
+		return res
+
+	def apply(self, data, structure, prefix, language):
+		"""
+		Returns the format with its placeholders substituted using data, like formatString().
+		"""
+		if structure and isinstance(structure, list):
+			structure = self.asDict("", structure)
+
+		if isinstance(data, list):
+			return ", ".join([self.apply(x, structure, prefix, language) for x in data])
+
+		elif isinstance(data, str):
+			return data
+
+		elif not data:
+			return self.format
+
+		res = []
+		depth = len(prefix)
+
+		try:
+			for segment in self.segments:
+				if not isinstance(segment, tuple):
+					res.append(segment)
+					continue
+
+				path, text = segment
+				val = None
+
+				if len(path) > depth and path[:depth] == prefix:
+					val = self.resolve(data, structure, path, depth, language)
+
+				if val is None:
+					res.append(text)
+					continue
+
+				# Placeholders within inserted values depend on the order of substitution
+				if "$(" in val:
+					raise _LegacyFormat()
+
+				res.append(val)
+
+		except _LegacyFormat:
+			return _formatStringLegacy(self.format, data, structure, prefix, language)
+
+		return "".join(res)
+
+	def resolve(self, data, structure, path, depth, language):
+		"""
+		Returns the replacement for the placeholder path, looking up path[depth] in data,
+		or None if the placeholder is left as is.
+		"""
+		key = path[depth]
+		if not data or not key in data.keys():
+			return None
+
+		val = data[key]
+		name = ".".join(path[:depth + 1])
+		isLeaf = depth == len(path) - 1
+
+		# Get structure if available
+		struct = self.asDict("s:" + name, structure.get(key) if structure else None)
+
+		if isinstance(val, dict):
+			if struct and name in self.names:
+				langs = struct.get("languages")
+				if not langs or not isLeaf:
+					return None
+
+				if language and language in langs:
+					val = val.get(language, "")
+				else:
+					val = ", ".join(val.values())
+
+			elif not isLeaf:
+				return self.resolve(val, structure, path, depth + 1, language)
+
+		elif isinstance(val, list) and len(val) > 0 and isinstance(val[0], dict):
+			if struct and "dest" in val[0] and "rel" in val[0]:
+				if not isLeaf:
+					return None
+
+				if not ("relskel" in struct and "format" in struct):
+					raise _LegacyFormat()
+
+				return ", ".join([formatString(struct["format"], v, struct["relskel"], [], language) for v in val])
+
+			elif not isLeaf:
+				return self.resolve(val[0], struct, path, depth + 1, language)
+
+		elif not isLeaf:
+			return None
+
+		elif isinstance(val, list):
+			val = ", ".join(val)
+
+		# Check for select-bones
+		if isinstance(struct, dict) and "values" in struct and struct["values"]:
+			vals = self.asDict("v:" + name, struct["values"])
+
+			# NO elif!
+			if isinstance(vals, dict):
+				if val in vals:
+					val = vals[val]
+
+		return str(val)
+
+def _formatStringLegacy(format, data, structure = None, prefix = None, language = None, _rec = 0):
+	"""
+	Substitutes the placeholders by walking all keys of data, replacing them in order.
+
+	Used by formatString() only where the result depends on that order: for relations
+	whose structure provides no format, each entry is formatted using the surrounding
+	format, and placeholders within inserted values are substituted again.
+	"""
 	if structure and isinstance(structure, list):
 		structure = {k:v for k, v in structure}
 
@@ -43,7 +215,7 @@ def formatString(format, data, structure = None, prefix = None, language = None,
 	res = format
 
 	if isinstance(data,  list):
-		return ", ".join([formatString(format, x, structure, prefix, language, _rec = _rec + 1) for x in data])
+		return ", ".join([_formatStringLegacy(format, x, structure, prefix, language, _rec = _rec + 1) for x in data])
 
 	elif isinstance(data, str):
 		return data
@@ -54,9 +226,6 @@ def formatString(format, data, structure = None, prefix = None, language = None,
 	for key in data.keys():
 		val = data[key]
 
-		#if _rec == 0:
-		#	print(key, val)
-
 		# Get structure if available
 		struct = structure.get(key) if structure else None
 		if isinstance(struct, list):
@@ -75,7 +244,7 @@ def formatString(format, data, structure = None, prefix = None, language = None,
 					continue
 
 			else:
-				res = formatString(res, val, structure, prefix + [key], language, _rec = _rec + 1)
+				res = _formatStringLegacy(res, val, structure, prefix + [key], language, _rec = _rec + 1)
 
 		elif isinstance(val, list) and len(val) > 0 and isinstance(val[0], dict):
 			if struct and "dest" in val[0] and "rel" in val[0]:
@@ -83,9 +252,9 @@ def formatString(format, data, structure = None, prefix = None, language = None,
 					format = struct["format"]
 					struct = struct["relskel"]
 
-				res = res.replace("$(%s)" % ".".join(prefix + [key]), ", ".join([formatString(format, v, struct, [], language, _rec=_rec + 1) for v in val]))
+				res = res.replace("$(%s)" % ".".join(prefix + [key]), ", ".join([_formatStringLegacy(format, v, struct, [], language, _rec=_rec + 1) for v in val]))
 			else:
-				res = formatString(res, val[0], struct, prefix + [key], language, _rec = _rec + 1)
+				res = _formatStringLegacy(res, val[0], struct, prefix + [key], language, _rec = _rec + 1)
 
 		elif isinstance(val, list):
 			val = ", ".join(val)
@@ -106,6 +275,59 @@ def formatString(format, data, structure = None, prefix = None, language = None,
 
 	return res
 
+_formatTemplates = {} # Compiled FormatTemplates by format string
+_formatTemplatesSize = 500 # Maximum number of compiled FormatTemplates kept
+
+def compileFormat(format):
+	"""
+	Returns the FormatTemplate for format, compiling it only once.
+
+	:param format: String containing the format.
+	:type format: str
+
+	:return: The compiled template.
+	:rtype: FormatTemplate
+	"""
+	template = _formatTemplates.get(format)
+
+	if template is None:
+		if len(_formatTemplates) >= _formatTemplatesSize:
+			_formatTemplates.clear()
+
+		template = _formatTemplates[format] = FormatTemplate(format)
+
+	return template
+
+def structureToDict(structure):
+	"""
+	Returns a skeleton structure as dict.
+
+	:param structure: The structure, either as dict or as list of (key, bone) pairs.
+	:type structure: list | dict
+
+	:return: The structure as dict, or structure itself if it is no list.
+	:rtype: dict
+	"""
+	if isinstance(structure, list):
+		return {k: v for k, v in structure}
+
+	return structure
+
+def escapeHtml(value):
+	"""
+	Escapes value for use as text or attribute value in HTML.
+
+	:param value: The value to escape; it is converted to str first.
+
+	:return: The escaped string.
+	:rtype: str
+	"""
+	return (str(value).replace("&", "&amp;")
+	            .replace("<", "&lt;")
+	            .replace(">", "&gt;")
+	            .replace('"', "&quot;")
+	            .replace("'", "&#39;"))
+
 def getImagePreview(data, cropped = False, size = 150):
 	if "mimetype" in data.keys() and isinstance(data["mimetype"], str) and data["mimetype"].startswith("image/svg"):
 		return "/file/download/%s/%s" % (data["dlkey"], data.get("name", "").replace("\"", ""))
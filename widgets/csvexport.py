@@ -38,15 +38,24 @@ class ExportCsv(html5.Progress):
 		if cursor:
 			self.params["cursor"] = cursor
 
+		NetworkService.structures.prepare(self.module, None, self.params)
 		NetworkService.request(self.module, "list", self.params,
 		                        successHandler=self.nextChunkComplete,
-		                        failureHandler=self.nextChunkFailure)
+		                        failureHandler=self.nextChunkFailure,
+		                        priority=NetworkService.PRIORITY_BACKGROUND)
 
 	def nextChunkComplete(self, req):
 		answ = NetworkService.decode(req)
 
 		if self.structure is None:
-			self.structure = answ["structure"]
+			self.structure = NetworkService.structures.resolve(self.module, None, answ)
+
+			params = NetworkService.structures.refetchParams(self.structure, req.params)
+			if params:
+				# The structure was left out, but has been dropped meanwhile (e.g. by a new login)
+				self.params = params
+				self.nextChunk()
+				return
 
 		if not answ["skellist"]:
 			self.exportToFile()
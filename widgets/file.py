@@ -155,17 +155,37 @@ class Uploader(html5.Progress):
 		self.uploadSuccess = EventDispatcher("uploadSuccess")
 		self.responseValue = None
 		self.context = context
+		self.file = file
+		self.node = node
+		self.pooledSkey = False # Determines if the upload uses a prefetched security key
 		# self.files = files
-		r = NetworkService.request("file", "getUploadURL", successHandler=self.onUploadUrlAvailable, secure=True)
-		r.file = file
-		r.node = node
+		self.requestUploadUrl()
 		conf["mainWindow"].log("progress", self)
 		self.parent()["class"].append("is_uploading")
 
+	def requestUploadUrl(self, freshSkey=False):
+		"""
+			Requests the url to upload to.
+			:param freshSkey: Fetch a fresh security key for the upload, instead of taking a prefetched one.
+			:type freshSkey: bool
+		"""
+		r = NetworkService.request("file", "getUploadURL", successHandler=self.onUploadUrlAvailable, secure=True)
+		r.file = self.file
+		r.node = self.node
+		r.freshSkey = freshSkey
+
 	def onUploadUrlAvailable(self, req):
 		"""
 			Internal callback - the actual upload url (retrieved by calling /file/getUploadURL) is known.
 		"""
+		skey = None if req.freshSkey else NetworkService.skeys.take()
+		if skey:
+			self.pooledSkey = True
+			self.upload(req.file, req.node, req.result, skey)
+			return
+
+		self.pooledSkey = False
+
 		r = NetworkService.request("", "/admin/skey", successHandler=self.onSkeyAvailable)
 		r.file = req.file
 		r.node = req.node
@@ -175,19 +195,25 @@ class Uploader(html5.Progress):
 		"""
 			Internal callback - the Security-Key is known.
 		"""
+		self.upload(req.file, req.node, req.destUrl, NetworkService.decode(req))
+
+	def upload(self, file, node, destUrl, skey):
+		"""
+			Starts the actual upload to destUrl.
+		"""
 		formData = eval("new FormData();")
-		formData.append("file", req.file)
+		formData.append("file", file)
 
 		if self.context:
 			for k, v in self.context.items():
 				formData.append(k, v)
 
-		if req.node and str(req.node) != "null":
-			formData.append("node", req.node)
+		if node and str(node) != "null":
+			formData.append("node", node)
 
-		formData.append("skey", NetworkService.decode(req))
+		formData.append("skey", skey)
 		self.xhr = eval("new XMLHttpRequest()")
-		self.xhr.open("POST", req.destUrl)
+		self.xhr.open("POST", destUrl)
 		self.xhr.onload = self.onLoad
 		self.xhr.upload.onprogress = self.onProgress
 		self.xhr.send(formData)
@@ -199,6 +225,10 @@ class Uploader(html5.Progress):
 		if self.xhr.status == 200:
 			self.responseValue = json.loads(self.xhr.responseText)
 			DeferredCall(self.onSuccess, _delay=1000)
+		elif self.xhr.status == 412 and self.pooledSkey:
+			# The prefetched security key wasn't accepted (anymore), so try again with a fresh one
+			NetworkService.skeys.clear()
+			self.requestUploadUrl(freshSkey=True)
 		else:
 			DeferredCall(self.onFailed, self.xhr.status, _delay=1000)
 
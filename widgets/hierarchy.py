@@ -295,7 +295,12 @@ class HierarchyWidget(html5.Div):
 
 	def onAttach(self):
 		super( HierarchyWidget, self ).onAttach()
-		NetworkService.registerChangeListener( self )
+		NetworkService.registerChangeListener( self, module=self.module )
+
+		# Also listen to the modules providing our root nodes
+		for k, v in conf[ "modules" ].items():
+			if v.get("handler") == "list" and v.get("rootNodeOf") == self.module:
+				NetworkService.registerChangeListener( self, module=k )
 
 	def onDetach(self):
 		super( HierarchyWidget, self ).onDetach()
@@ -410,6 +415,10 @@ class HierarchyWidget(html5.Div):
 					res.extend( collectExpandedNodes(c.ol) )
 			return( res )
 		self._expandedNodes = collectExpandedNodes( self.entryFrame )
+
+		for req in self._currentRequests:
+			req.abort()
+
 		self._currentRequests = []
 		for c in self.entryFrame._children[:]:
 			self.entryFrame.removeChild(c)
@@ -433,6 +442,8 @@ class HierarchyWidget(html5.Div):
 		if self.context:
 			params.update(self.context)
 
+		NetworkService.structures.prepare(self.module, None, params)
+
 		r = NetworkService.request(self.module, "list",
 		                            params,
 		                            successHandler=self.onRequestSucceded,
@@ -452,6 +463,18 @@ class HierarchyWidget(html5.Div):
 
 		self._currentRequests.remove(req)
 		data = NetworkService.decode(req)
+		structure = NetworkService.structures.resolve(self.module, None, data)
+
+		params = NetworkService.structures.refetchParams(structure, req.params)
+		if params:
+			# The structure was left out, but has been dropped meanwhile (e.g. by a new login)
+			r = NetworkService.request(self.module, "list",
+			                            params,
+			                            successHandler=self.onRequestSucceded,
+			                            failureHandler=self.showErrorMsg)
+			r.node = req.node
+			self._currentRequests.append(r)
+			return
 
 		if req.node == self.rootNode:
 			ol = self.entryFrame
@@ -461,7 +484,7 @@ class HierarchyWidget(html5.Div):
 			assert ol is not None
 
 		for skel in data["skellist"]:
-			hi = HierarchyItem( self.module, skel, data["structure"] )
+			hi = HierarchyItem( self.module, skel, structure )
 			ol.appendChild( hi )
 			if hi.data["key"] in self._expandedNodes:
 				hi.toggleExpand()
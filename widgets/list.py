@@ -1,5 +1,5 @@
 #-*- coding: utf-8 -*-
-import html5
+import html5, time
 from config import conf
 from i18n import translate
 from network import NetworkService
@@ -27,11 +27,21 @@ class ListWidget(html5.Div):
 			assert module in conf["modules"].keys()
 
 		super(ListWidget, self).__init__()
-		self._batchSize = batchSize or conf["batchSize"]    # How many rows do we fetch at once?
 		self.isDetaching = False #If set, this widget is beeing about to be removed - dont issue nextBatchNeeded requests
 		self.module = module
 		self.context = context
 
+		# Batch sizing and read-ahead can be overridden per module
+		moduleInfo = conf["modules"][module]
+
+		self._batchSize = batchSize or moduleInfo.get("batchSize") or conf["batchSize"] # How many rows do we fetch at once?
+		self._minBatchSize = moduleInfo.get("minBatchSize") or conf["batchSize.min"]
+		self._maxBatchSize = moduleInfo.get("maxBatchSize") or conf["batchSize.max"]
+		self._adaptBatchSize = not batchSize # An explicitly given batchSize is used as is
+		self._readAhead = moduleInfo.get("readAhead", conf["batchSize.readAhead"]) # Number of batches fetched in advance
+		self._readAheadBuffer = [] # Batches fetched in advance, but not displayed yet
+		self._batchNeeded = False # Determines if the table waits for the batch currently requested
+
 		self.actionBar = ActionBar(module, "list", currentAction="list")
 		self.appendChild( self.actionBar )
 
@@ -60,6 +70,7 @@ class ListWidget(html5.Div):
 		           and conf["modules"][module]["indexes"])
 
 		self.table = DataTable( checkboxes=checkboxes, indexes=indexes, *args, **kwargs )
+		self.table.rowsRenderedEvent.register( self )
 		self.appendChild( self.table )
 		self._currentCursor = None
 		self._structure = None
@@ -173,28 +184,102 @@ class ListWidget(html5.Div):
 
 	def onNextBatchNeeded(self):
 		"""
-			Requests the next rows from the server and feed them to the table.
+			Feeds the next rows to the table, from the batches read ahead or from the server.
 		"""
-		if self._currentCursor and not self.isDetaching:
-			filter = {}
+		if self.isDetaching:
+			self.table.setDataProvider(None)
+			return
 
-			if self.context:
-				filter.update(self.context)
+		if self._readAheadBuffer:
+			self.showBatch(self._readAheadBuffer.pop(0))
+		elif self._currentCursor or self._currentRequests:
+			self._batchNeeded = True
+			self.requestBatch()
+		else:
+			self.table.setDataProvider(None)
 
-			filter.update(self.filter)
-			filter["amount"] = self._batchSize
-			filter["cursor"] = self._currentCursor
+	def requestBatch(self):
+		"""
+			Requests the rows following the current cursor from the server.
+			Only one batch is requested at a time, as each one yields the cursor for the next one.
+			Batches fetched in advance are requested with a lower priority, which is raised
+			once the table waits for them.
+		"""
+		if self._currentRequests or not self._currentCursor:
+			if self._batchNeeded:
+				for req in self._currentRequests:
+					NetworkService.raisePriority(req, NetworkService.PRIORITY_VISIBLE)
 
-			self._currentRequests.append(NetworkService.request(self.module, "list", filter,
-			                                successHandler=self.onCompletion, failureHandler=self.showErrorMsg,
-			                                cacheable=True ) )
-			self._currentCursor = None
+			return
+
+		filter = {}
+
+		if self.context:
+			filter.update(self.context)
+
+		filter.update(self.filter)
+		filter["amount"] = self._batchSize
+		filter["cursor"] = self._currentCursor
+		NetworkService.structures.prepare(self.module, None, filter)
+
+		self._currentRequests.append(NetworkService.request(self.module, "list", filter,
+		                                successHandler=self.onCompletion, failureHandler=self.showErrorMsg,
+		                                cacheable=True,
+		                                priority=NetworkService.PRIORITY_VISIBLE if self._batchNeeded
+		                                            else NetworkService.PRIORITY_PREFETCH))
+		self._currentCursor = None
+
+	def readAhead(self):
+		"""
+			Fetches the next batches in advance, up to the configured number of batches.
+		"""
+		if len(self._readAheadBuffer) < self._readAhead and not self.isDetaching:
+			self.requestBatch()
+
+	def showBatch(self, skellist):
+		"""
+			Feeds a batch of rows to the table and fetches the next one in advance.
+		"""
+		if self._currentCursor or self._currentRequests or self._readAheadBuffer:
+			self.table.setDataProvider(self)
 		else:
 			self.table.setDataProvider(None)
 
+		self.table.extend(skellist)
+		self.readAhead()
+
+	def onRowsRendered(self, table, rows, renderTime):
+		"""
+			Adapts the batch size to the time the table needed to render some rows.
+			The rows of a batch are rendered over several frames, so the time for a
+			whole batch is projected from the time per row.
+		"""
+		if rows:
+			self.updateBatchSize(renderTime=renderTime / rows * self._batchSize)
+
+	def updateBatchSize(self, requestTime=None, renderTime=None):
+		"""
+			Adapts the number of rows fetched at once to the measured times for one batch.
+			Slow requests enlarge batches to save round trips, slow rendering makes them smaller.
+			:param requestTime: Time in ms it took to fetch the last batch.
+			:param renderTime: Time in ms it takes to render one batch.
+		"""
+		if not self._adaptBatchSize:
+			return
+
+		if renderTime is not None and renderTime > conf["batchSize.renderBudget"]:
+			self._batchSize = int(self._batchSize * conf["batchSize.renderBudget"] / renderTime)
+		elif requestTime is not None and requestTime > conf["batchSize.slowRequest"]:
+			self._batchSize = int(self._batchSize * 1.5)
+
+		self._batchSize = max(self._minBatchSize, min(self._maxBatchSize, self._batchSize))
+
+		# Larger batches take longer to arrive, so ask for them earlier
+		self.table.setPrefetchRows(max(conf["table.prefetchRows"], int(self._batchSize / 2)))
+
 	def onAttach(self):
 		super( ListWidget, self ).onAttach()
-		NetworkService.registerChangeListener( self )
+		NetworkService.registerChangeListener( self, module=self.module )
 
 	def onDetach(self):
 		self.isDetaching = True
@@ -216,6 +301,12 @@ class ListWidget(html5.Div):
 		"""
 		self.table.clear()
 		self._currentCursor = None
+		self._readAheadBuffer = []
+		self._batchNeeded = True
+
+		for req in self._currentRequests:
+			req.abort()
+
 		self._currentRequests = []
 
 		filter = {}
@@ -224,6 +315,7 @@ class ListWidget(html5.Div):
 
 		filter.update(self.filter)
 		filter["amount"] = self._batchSize
+		NetworkService.structures.prepare(self.module, None, filter)
 
 		self._currentRequests.append(
 			NetworkService.request(self.module, "list", filter,
@@ -264,10 +356,28 @@ class ListWidget(html5.Div):
 		self._currentRequests.remove( req )
 		self.actionBar.resetLoadingState()
 
+		if not req.fromCache and req.sentAt:
+			# Measured from leaving the queue, as waiting for a free slot doesn't depend on the batch size
+			self.updateBatchSize(requestTime=time.time() * 1000 - req.sentAt)
+
 		data = NetworkService.decode( req )
+		structure = NetworkService.structures.resolve(self.module, None, data)
 
-		if data["structure"] is None:
-			if self.table.getRowCount():
+		params = NetworkService.structures.refetchParams(structure, req.params)
+		if params:
+			# The structure was left out, but has been dropped meanwhile (e.g. by a new login)
+			self._currentRequests.append(NetworkService.request(self.module, "list", params,
+			                                successHandler=self.onCompletion, failureHandler=self.showErrorMsg,
+			                                cacheable=True))
+			return
+
+		isNeeded = self._batchNeeded
+		self._batchNeeded = False
+
+		if structure is None or not data["skellist"]:
+			if not isNeeded:
+				return # Nothing more to read ahead; the table is told when it asks for it
+			elif self.table.getRowCount():
 				self.table.setDataProvider(None) #We cant load any more results
 			else:
 				self.table["style"]["display"] = "none"
@@ -277,24 +387,25 @@ class ListWidget(html5.Div):
 
 		self.table["style"]["display"] = ""
 		self.emptyNotificationDiv["style"]["display"] = "none"
-		self._structure = data["structure"]
+		self._structure = structure
 
 		if not self._tableHeaderIsValid:
 			if not self.columns:
 				self.columns = []
-				for boneName, boneInfo in data["structure"]:
+				for boneName, boneInfo in structure:
 					if boneInfo["visible"]:
 						self.columns.append( boneName )
 			self.setFields( self.columns )
 
 
-		if data["skellist"] and "cursor" in data.keys():
+		if "cursor" in data.keys():
 			self._currentCursor = data["cursor"]
-			self.table.setDataProvider(self)
-		else:
-			self.table.setDataProvider(None)
 
-		self.table.extend( data["skellist"] )
+		if isNeeded:
+			self.showBatch( data["skellist"] )
+		else:
+			self._readAheadBuffer.append( data["skellist"] )
+			self.readAhead()
 
 	def setFields(self, fields):
 		if not self._structure:
@@ -306,11 +417,12 @@ class ListWidget(html5.Div):
 
 		fields = [x for x in fields if x in tmpDict.keys()]
 		self.columns = fields
+		rendersDict = {}
 
 		for boneName in fields:
 			boneInfo = tmpDict[boneName]
 			delegateFactory = viewDelegateSelector.select( self.module, boneName, tmpDict )( self.module, boneName, tmpDict )
-			self.table.setCellRender( boneName, delegateFactory )
+			rendersDict[ boneName ] = delegateFactory
 			boneInfoList.append( boneInfo )
 
 		if conf["showBoneNames"]:
@@ -318,16 +430,11 @@ class ListWidget(html5.Div):
 		else:
 			self.table.setHeader([x.get("descr", "") for x in boneInfoList])
 
+		self.table.beginUpdate()
 		self.table.setShownFields(fields)
-		rendersDict = {}
-
-		for boneName in fields:
-			boneInfo = tmpDict[boneName]
-			delegateFactory = viewDelegateSelector.select( self.module, boneName, tmpDict )( self.module, boneName, tmpDict )
-			rendersDict[ boneName ] = delegateFactory
-			boneInfoList.append( boneInfo )
-
 		self.table.setCellRenders( rendersDict )
+		self.table.endUpdate()
+
 		self._tableHeaderIsValid = True
 
 	def getFields(self):
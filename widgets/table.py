@@ -1,8 +1,120 @@
 # -*- coding: utf-8 -*-
-import html5, utils
+import html5, utils, time
+from __pyjamas__ import JS
+from config import conf
 from event import EventDispatcher
 from network import DeferredCall
 
+class RowSelection( object ):
+	"""
+		Set of selected row-indexes.
+
+		Rows below 'limit' are selected unless listed in 'rows', rows from 'limit' on
+		are selected if listed in 'rows'. This allows selecting, unselecting and
+		inverting all rows in constant time.
+	"""
+	def __init__(self):
+		super(RowSelection, self).__init__()
+		self.limit = 0
+		self.rows = {}
+		self.size = 0
+
+	def contains(self, row):
+		"""
+			Returns True if row is selected.
+		"""
+		return (row < self.limit) != (row in self.rows)
+
+	def count(self):
+		"""
+			Returns the number of selected rows.
+		"""
+		return self.size
+
+	def add(self, row):
+		"""
+			Selects row.
+			:returns: True if the selection changed.
+		"""
+		if self.contains(row):
+			return False
+
+		self._toggle(row)
+		self.size += 1
+		return True
+
+	def remove(self, row):
+		"""
+			Unselects row.
+			:returns: True if the selection changed.
+		"""
+		if not self.contains(row):
+			return False
+
+		self._toggle(row)
+		self.size -= 1
+		return True
+
+	def _toggle(self, row):
+		if row in self.rows:
+			del self.rows[row]
+		else:
+			self.rows[row] = True
+
+	def selectAll(self, total):
+		"""
+			Selects the rows 0 to total (exclusive).
+		"""
+		self.limit = total
+		self.rows = {}
+		self.size = total
+
+	def clear(self):
+		"""
+			Unselects all rows.
+		"""
+		self.limit = 0
+		self.rows = {}
+		self.size = 0
+
+	def invert(self, total):
+		"""
+			Inverts the selection of the rows 0 to total (exclusive).
+		"""
+		if self.limit == 0 or self.limit == total:
+			# Rows listed in self.rows keep their exception status
+			self.limit = total - self.limit
+			self.size = total - self.size
+			return
+
+		rows = {}
+		for row in range(0, total):
+			if not self.contains(row):
+				rows[row] = True
+
+		self.limit = 0
+		self.rows = rows
+		self.size = len(rows)
+
+	def first(self):
+		"""
+			Returns the lowest selected row, or None.
+		"""
+		if not self.size:
+			return None
+
+		rows = self.toList()
+		return rows[0]
+
+	def toList(self):
+		"""
+			Returns the selected rows in ascending order.
+			:returns: list
+		"""
+		rows = [row for row in range(0, self.limit) if not row in self.rows]
+		rows.extend(sorted([row for row in self.rows.keys() if row >= self.limit]))
+		return rows
+
 class SelectTable( html5.Table ):
 	"""
 		Provides an Html-Table which allows for row selections.
@@ -34,7 +146,8 @@ class SelectTable( html5.Table ):
 
 		self["tabindex"] = 1
 
-		self._selectedRows = [] # List of row-indexes currently selected
+		self._selection = RowSelection() # The row-indexes currently selected
+		self._selectionChanged = False # Determines if a selectionChanged event is pending
 		self._currentRow = None # Rowindex of the cursor row
 		self._isMouseDown = False # Tracks status of the left mouse button
 		self._isCtlPressed = False # Tracks status of the ctrl key
@@ -51,6 +164,10 @@ class SelectTable( html5.Table ):
 		self.checkboxes = checkboxes
 		self.checkboxes_col = (self.indexes_col + 1) if checkboxes else -1
 
+		self._rowOffset = 0 # Row-index of the first row present in the DOM
+		self._rows = [] # The tr widgets present in the DOM, in order
+		self._totalRows = None # Number of rows, if not all of them are present in the DOM
+
 	def onAttach(self):
 		super(SelectTable, self).onAttach()
 		self.focus()
@@ -90,12 +207,11 @@ class SelectTable( html5.Table ):
 			Retrieves the TR element by the given row number
 			:param idx: Rownumber to retrieve the tr of
 			:type idx: int
-			:returns: HTMLTableRowElement
+			:returns: HTMLTableRowElement, or None if the row is not present in the DOM
 		"""
-		for c in self.body._children:
-			if idx <= 0:
-				return c
-			idx -= c["rowspan"]
+		idx -= self._rowOffset
+		if 0 <= idx < len(self._rows):
+			return self._rows[idx]
 
 		return None
 
@@ -107,12 +223,11 @@ class SelectTable( html5.Table ):
 			:type tr: HTMLTableRowElement
 			:returns: int or None
 		"""
-		idx = 0
-		for c in self.body._children:
-			if c.element == tr:
-				return( idx )
-			idx += c["rowspan"]
-		return( idx )
+		idx = tr.sectionRowIndex
+		if 0 <= idx < len(self._rows) and self._rows[idx].element == tr:
+			return( idx + self._rowOffset )
+
+		return( len(self._rows) + self._rowOffset )
 
 	def _rowForEvent(self, event ):
 		"""
@@ -145,7 +260,7 @@ class SelectTable( html5.Table ):
 		row = self.getIndexByTr( tr )
 
 		if self.checkboxes and html5.utils.doesEventHitWidgetOrChildren(event, self._checkboxes[row]):
-			self._checkboxes[ row ][ "checked" ] = row in self._selectedRows
+			self._checkboxes[ row ][ "checked" ] = self._selection.contains( row )
 
 	def onMouseDown(self, event):
 		tr = self._rowForEvent( event )
@@ -155,9 +270,9 @@ class SelectTable( html5.Table ):
 		row = self.getIndexByTr( tr )
 
 		if self._isCtlPressed:
-			if row in self._selectedRows:
-				for x in self._selectedRows:
-					self.getTrByIndex(x).removeClass("is_focused") # remove focus
+			if self._selection.contains( row ):
+				if self._currentRow is not None:
+					self._setRowClass(self._currentRow, "is_focused", False) # remove focus
 				self.removeSelectedRow( row )
 			else:
 				self.addSelectedRow( row )
@@ -165,14 +280,12 @@ class SelectTable( html5.Table ):
 			event.preventDefault()
 
 		elif self._isShiftPressed:
-			self.unSelectAll()
-			for i in ( range(self._ctlStartRow, row+1) if self._ctlStartRow <= row else range(row, self._ctlStartRow+1) ):
-				self.addSelectedRow( i )
+			self.selectRange( self._ctlStartRow, row )
 			self.setCursorRow(row, False) # set focus
 			event.preventDefault()
 
 		elif self.checkboxes and html5.utils.doesEventHitWidgetOrChildren(event, self._checkboxes[row]):
-			if row in self._selectedRows:
+			if self._selection.contains( row ):
 				self.removeSelectedRow( row )
 			else:
 				self.addSelectedRow( row )
@@ -181,7 +294,7 @@ class SelectTable( html5.Table ):
 			self._isMouseDown = True
 
 			if self.checkboxes:
-				if row in self._selectedRows:
+				if self._selection.contains( row ):
 					self.removeSelectedRow( row )
 				else:
 					self.addSelectedRow( row )
@@ -210,10 +323,10 @@ class SelectTable( html5.Table ):
 					else:
 						self.addSelectedRow(self._currentRow)
 
-						if self._currentRow + 1 < self.getRowCount():
+						if self._currentRow + 1 < self.getTotalRowCount():
 							self.addSelectedRow(self._currentRow + 1)
 
-				if self._currentRow + 1 < self.getRowCount():
+				if self._currentRow + 1 < self.getTotalRowCount():
 					self.setCursorRow(self._currentRow + 1,
 									  removeExistingSelection=(not self._isShiftPressed and not self._isCtlPressed))
 
@@ -242,8 +355,8 @@ class SelectTable( html5.Table ):
 
 		elif html5.isReturn(event):  # Return
 
-			if len(self._selectedRows) > 0:
-				self.selectionActivatedEvent.fire(self, self._selectedRows)
+			if self._selection.count() > 0:
+				self.selectionActivatedEvent.fire(self, self._selection.toList())
 				event.preventDefault()
 				return
 
@@ -261,7 +374,7 @@ class SelectTable( html5.Table ):
 		elif html5.isShift(event):  # Shift
 			self._isShiftPressed = True
 			try:
-				self._ctlStartRow = self._currentRow or self._selectedRows[0] or 0
+				self._ctlStartRow = self._currentRow or self._selection.first() or 0
 			except:
 				self._ctlStartRow = 0
 
@@ -271,7 +384,7 @@ class SelectTable( html5.Table ):
 			self._ctlStartRow = None
 
 			# leave selection mode if there is only one row selected and return to normal focus
-			if len(self._selectedRows) == 1:
+			if self._selection.count() == 1:
 				for row in self.getCurrentSelection():
 					self.removeSelectedRow(row)
 
@@ -288,18 +401,13 @@ class SelectTable( html5.Table ):
 		"""
 			Marks a row as selected
 		"""
-		if row in self._selectedRows:
+		if not self._selection.add( row ):
 			return
 
-		self._selectedRows.append( row )
-
-		tr = self.getTrByIndex( row )
-		tr["class"].append("is_selected")
-
-		if self.checkboxes:
-			self._checkboxes[ row ][ "checked" ] = True
+		self._setRowClass(row, "is_selected", True)
+		self._setRowChecked(row, True)
 
-		self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
+		self.fireSelectionChanged()
 
 	def removeSelectedRow(self, row):
 		"""
@@ -307,18 +415,28 @@ class SelectTable( html5.Table ):
 			:param row: Number of the row to unselect
 			:type row: int
 		"""
-		if not row in self._selectedRows:
+		if not self._selection.remove( row ):
 			return
 
-		self._selectedRows.remove( row )
+		self._setRowClass(row, "is_selected", False)
+		self._setRowChecked(row, False)
 
-		tr = self.getTrByIndex( row )
-		tr["class"].remove("is_selected")
+		self.fireSelectionChanged()
 
-		if self.checkboxes:
-			self._checkboxes[ row ][ "checked" ] = False
+	def selectRange(self, first, last):
+		"""
+			Sets the current selection to the rows between first and last (both inclusive).
+			Any previous selection is removed.
+		"""
+		if first > last:
+			first, last = last, first
 
-		self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
+		self._selection.clear()
+		for row in range(first, last + 1):
+			self._selection.add( row )
+
+		self.refreshRows()
+		self.fireSelectionChanged()
 
 	def selectRow(self, newRow ):
 		"""
@@ -329,16 +447,11 @@ class SelectTable( html5.Table ):
 		"""
 		self.setCursorRow( newRow )
 
-		for row in self._selectedRows[:]:
-			if row!=newRow:
-				self.removeSelectedRow( row )
-
-		if not newRow in self._selectedRows:
-			self._selectedRows.append( newRow )
-			tr = self.getTrByIndex( newRow )
-			tr["class"].append("is_selected")
+		self._selection.clear()
+		self._selection.add( newRow )
 
-		self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
+		self.refreshRows()
+		self.fireSelectionChanged()
 
 	def setCursorRow(self, row, removeExistingSelection=True ):
 		"""
@@ -346,31 +459,116 @@ class SelectTable( html5.Table ):
 			If removeExistingSelection is True, the current selection (if any) is invalidated.
 		"""
 		if self._currentRow is not None:
-			self.getTrByIndex(self._currentRow)["class"].remove("is_focused")
+			self._setRowClass(self._currentRow, "is_focused", False)
 
 		self._currentRow = row
 		if self._currentRow is not None:
-			self.getTrByIndex(self._currentRow)["class"].append("is_focused")
+			self._setRowClass(self._currentRow, "is_focused", True)
 			self.cursorMovedEvent.fire( self, row )
 
 		if removeExistingSelection:
-			for row in self._selectedRows[:]:
-				self.removeSelectedRow( row )
-			self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
+			if self._selection.count():
+				self._selection.clear()
+				self.refreshRows()
+
+			self.fireSelectionChanged()
 
-		DeferredCall(self.focusRow, row)
+		DeferredCall(self.focusRow, row, _queue="frame")
 
 	def focusRow(self, row):
 		tr = self.getTrByIndex(row)
 		# fixme: Re-implement maybe later?
 
+	def _setRowClass(self, row, cls, active):
+		"""
+			Adds or removes the class cls to the row, if it is present in the DOM.
+		"""
+		tr = self.getTrByIndex(row)
+		if tr is None:
+			return
+
+		if active and not cls in tr["class"]:
+			tr["class"].append(cls)
+		elif not active and cls in tr["class"]:
+			tr["class"].remove(cls)
+
+	def _setRowChecked(self, row, checked):
+		"""
+			Sets the checkbox of the row, if it is present in the DOM.
+		"""
+		if self.checkboxes and row in self._checkboxes.keys():
+			self._checkboxes[ row ][ "checked" ] = checked
+
+	def refreshRows(self, first=None, last=None):
+		"""
+			Applies the selection and cursor state to the rows first to last (exclusive).
+			Used after rows have been (re-)added to the DOM, or the selection changed at once.
+			Defaults to all rows present in the DOM.
+		"""
+		if first is None:
+			first = self._rowOffset
+
+		if last is None:
+			last = self._rowOffset + len(self._rows)
+
+		for row in range(first, last):
+			selected = self._selection.contains(row)
+			self._setRowClass(row, "is_selected", selected)
+			self._setRowClass(row, "is_focused", row == self._currentRow)
+			self._setRowChecked(row, selected)
+
+	def fireSelectionChanged(self):
+		"""
+			Schedules the selectionChanged event.
+			All changes made while handling the same user interaction are reported by a single event.
+		"""
+		if self._selectionChanged:
+			return
+
+		self._selectionChanged = True
+		DeferredCall(self._emitSelectionChanged, _delay=0)
+
+	def _emitSelectionChanged(self):
+		self._selectionChanged = False
+		self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
+
+	def setRowOffset(self, offset):
+		"""
+			Removes all rows from the DOM, keeping the selection and the cursor.
+			Rows added afterwards start at row-index 'offset'.
+			:param offset: Row-index of the next row added to the DOM
+			:type offset: int
+		"""
+		self.body.removeAllChildren()
+		self._rows = []
+		self._checkboxes = {}
+		self._rowOffset = offset
+
+	def setTotalRowCount(self, count):
+		"""
+			Sets the number of rows, including those not present in the DOM.
+			:param count: Number of rows, or None if all rows are present in the DOM
+			:type count: int
+		"""
+		self._totalRows = count
+
+	def getTotalRowCount(self):
+		"""
+			Returns the number of rows, including those not present in the DOM.
+			:returns: int
+		"""
+		if self._totalRows is not None:
+			return self._totalRows
+
+		return self.getRowCount()
+
 	def getCurrentSelection(self):
 		"""
 			Returns a list of currently selected row-numbers
 			:returns: list
 		"""
-		if self._selectedRows:
-			return self._selectedRows[:]
+		if self._selection.count():
+			return self._selection.toList()
 		elif self._currentRow is not None:
 			return [self._currentRow]
 
@@ -380,27 +578,64 @@ class SelectTable( html5.Table ):
 		"""
 			Hook the clear() method so we can reset some internal states, too
 		"""
-		super(SelectTable, self).clear()
+		self.body.removeAllChildren()
+		self._rows = []
 		self._currentRow = None
-		self._selectedRows = []
+		self._selection.clear()
+		self._checkboxes = {}
+		self._rowOffset = 0
 
-		self.selectionChangedEvent.fire(self, self.getCurrentSelection())
-		self.tableChangedEvent.fire(self, self.getRowCount())
+		self.fireSelectionChanged()
+		self.tableChangedEvent.fire(self, self.getTotalRowCount())
 
 	def removeRow(self, row):
 		"""
 			Hook the removeRow method so we can reset some internal states, too
 		"""
-		if row in self._selectedRows:
-			self._selectedRows.remove( row )
-			self.selectionChangedEvent.fire( self )
+		if self._selection.remove( row ):
+			self.fireSelectionChanged()
 
 		if self._currentRow == row:
 			self._currentRow = None
 			self.cursorMovedEvent.fire( self )
 
-		self.tableChangedEvent.fire(self, self.getRowCount())
-		super( SelectTable, self ).removeRow( row )
+		self.tableChangedEvent.fire(self, self.getTotalRowCount())
+
+		if self.checkboxes:
+			checkboxes = {}
+			for idx, checkbox in self._checkboxes.items():
+				if idx != row:
+					checkboxes[ idx - 1 if idx > row else idx ] = checkbox
+
+			self._checkboxes = checkboxes
+
+		row -= self._rowOffset
+		if 0 <= row < len(self._rows):
+			self.body.removeChild( self._rows[ row ] )
+			self._rows.pop( row )
+
+	def getRowCount(self):
+		"""
+			Returns the number of rows present in the DOM.
+			:returns: int
+		"""
+		return len(self._rows)
+
+	def prepareRow(self, row):
+		"""
+			Ensures the rows up to 'row' are present in the DOM.
+		"""
+		while len(self._rows) <= row:
+			tr = html5.Tr()
+			self.body.appendChild(tr)
+			self._rows.append(tr)
+
+	def prepareGrid(self, rows, cols):
+		"""
+			Appends 'rows' rows with the cells up to column 'cols' to the DOM.
+		"""
+		for row in range(len(self._rows), len(self._rows) + rows):
+			self.prepareCol(row, cols)
 
 	def _extraCols(self):
 		return int( self.checkboxes ) + int( self.indexes )
@@ -410,7 +645,7 @@ class SelectTable( html5.Table ):
 		Lets hook up the original removeRow function to optionally
 		provide index and checkbox columns.
 		"""
-		super( SelectTable, self ).prepareCol( row, col + self._extraCols() - 1 )
+		self._prepareCells( row, col + self._extraCols() )
 
 		if self.checkboxes:
 			checkbox = html5.Input()
@@ -418,105 +653,177 @@ class SelectTable( html5.Table ):
 			checkbox[ "class" ].append( "check" )
 			checkbox[ "checked" ] = False
 
-			self["cell"][ row ][ self.checkboxes_col ] = checkbox
-			self._checkboxes[ row ] = checkbox
+			self._setCellWidget( row, self.checkboxes_col, checkbox )
+			self._checkboxes[ row + self._rowOffset ] = checkbox
 
 		if self.indexes:
-			lbl = html5.Label( str( row + 1 ) )
+			lbl = html5.Label( str( row + self._rowOffset + 1 ) )
 			lbl[ "class" ].append( "index" )
-			self["cell"][ row ][ self.indexes_col ] = lbl
+			self._setCellWidget( row, self.indexes_col, lbl )
 
-		self.tableChangedEvent.fire(self, self.getRowCount())
+		self.tableChangedEvent.fire(self, self.getTotalRowCount())
 
 	def setCell(self, row, col, val):
 		"""
 		Interface for self["cell"] that directs to the correct cell if extra columns are
 		configured for this SelectTable.
 		"""
-		self[ "cell" ][ row ][ col + self._extraCols() ] = val
+		row -= self._rowOffset
+		col += self._extraCols()
 
-	def selectAll(self):
+		self._prepareCells( row, col + 1 )
+		self._setCellWidget( row, col, val )
+
+	def _prepareCells(self, row, cols):
 		"""
-		Selects all entries of the table.
+			Ensures the DOM row 'row' exists and has at least 'cols' cells.
+		"""
+		self.prepareRow(row)
+
+		tr = self._rows[ row ]
+		while len(tr._children) < cols:
+			tr.appendChild(html5.Td())
+
+	def setRowCells(self, row, cells):
 		"""
-		self._selectedRows = range(0, self.getRowCount() )
+			Fills the cells of row 'row' following the index and checkbox columns.
+			Each cell is either a widget, or a string of HTML which is inserted as is;
+			consecutive HTML cells are written to the DOM at once.
+			:param row: Row-index of the row
+			:type row: int
+			:param cells: List of widgets or HTML strings
+			:type cells: list
+		"""
+		row -= self._rowOffset
 
-		for row in self._selectedRows:
-			tr = self.getTrByIndex( row )
+		if row >= len(self._rows):
+			self.prepareCol( row, 0 )
 
-			if not "is_selected" in tr["class"]:
-				tr["class"].append("is_selected")
+		tr = self._rows[ row ]
+		fragments = []
 
-			if self.checkboxes:
-				self._checkboxes[ row ][ "checked" ] = True
+		for cell in cells:
+			if isinstance( cell, str ):
+				fragments.append( "<td>%s</td>" % cell )
+				continue
 
-		self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
-		return len(self._selectedRows)
+			if fragments:
+				tr.element.insertAdjacentHTML( "beforeend", "".join( fragments ) )
+				fragments = []
 
-	def unSelectAll(self):
+			td = html5.Td()
+			td.appendChild( cell )
+			tr.appendChild( td )
+
+		if fragments:
+			tr.element.insertAdjacentHTML( "beforeend", "".join( fragments ) )
+
+	def _setCellWidget(self, row, col, val):
 		"""
-		Unselects all entries of the table.
+			Replaces the contents of the cell at DOM row 'row' and column 'col' by val.
 		"""
-		unsel = len(self._selectedRows)
+		td = self._rows[ row ]._children[ col ]
+		td.removeAllChildren()
 
-		for row in self._selectedRows:
-			tr = self.getTrByIndex( row )
-			tr["class"].remove("is_selected")
+		if isinstance( val, str ):
+			val = html5.TextNode( val )
 
-			if self.checkboxes:
-				self._checkboxes[ row ][ "checked" ] = False
+		td.appendChild( val )
 
-		self._selectedRows = []
-		self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
+	def selectAll(self):
+		"""
+		Selects all entries of the table.
+		"""
+		self._selection.selectAll( self.getTotalRowCount() )
+
+		self.refreshRows()
+		self.fireSelectionChanged()
+		return self._selection.count()
+
+	def unSelectAll(self):
+		"""
+		Unselects all entries of the table.
+		"""
+		unsel = self._selection.count()
+		self._selection.clear()
+
+		self.refreshRows()
+		self.fireSelectionChanged()
 		return unsel
 
 	def invertSelection(self):
 		"""
 		Inverts the current selection on the whole table currently displayed.
 		"""
-		current = self._selectedRows[:]
-		self._selectedRows = []
-
-		for row in range(0, self.getRowCount() ):
-			tr = self.getTrByIndex( row )
-
-			if row in current:
-				tr["class"].remove("is_selected")
-			else:
-				self._selectedRows.append(row)
-				tr["class"].append("is_selected")
+		current = self._selection.count()
+		self._selection.invert( self.getTotalRowCount() )
 
-			if self.checkboxes:
-				self._checkboxes[ row ][ "checked" ] = row in self._selectedRows
-
-		self.selectionChangedEvent.fire( self, self.getCurrentSelection() )
-		return len(self._selectedRows), len(current)
+		self.refreshRows()
+		self.fireSelectionChanged()
+		return self._selection.count(), current
 
 
 
 class DataTable( html5.Div ):
 	"""
 		Provides kind of MVC on top of SelectTable.
+
+		In virtual mode (see conf["table.virtualize"]), only the rows in and near the
+		viewport are present in the DOM; the rows above and below are replaced by
+		spacers of the same height. Rows are measured once rendered; rows not
+		rendered yet are assumed to be as high as the rows measured so far on average.
 	"""
 
 	def __init__( self, _loadOnDisplay = False, *args, **kwargs ):
 		super( DataTable, self ).__init__( )
+
+		virtual = conf["table.virtualize"]
+		if "virtual" in kwargs.keys():
+			virtual = kwargs["virtual"]
+			del kwargs["virtual"]
+
 		self.table = SelectTable( *args, **kwargs )
-		self.appendChild(self.table)
 
 		self._loadOnDisplay = _loadOnDisplay # Load all data content continuously when displaying
+		self._virtual = virtual and not _loadOnDisplay # Only render the rows in and near the viewport
+		self._window = None # Range of model-indexes currently present in the DOM (virtual mode only)
+		self._windowTop = 0 # Offset in px of the first row present in the DOM (virtual mode only)
+		self._windowCount = 0 # Number of rows the spacers were sized for (virtual mode only)
+		self._rowHeights = [] # Measured height in px of each row, or None if not measured yet (virtual mode only)
+		self._measuredHeight = 0 # Sum of all measured row heights
+		self._measuredRows = 0 # Number of measured rows
+		self._rowOffsets = None # Cached offset in px of each row and the total height, see _getRowOffsets()
+
+		if self._virtual:
+			self.topSpacer = html5.Div()
+			self.topSpacer["class"].append("spacer")
+			self.appendChild(self.topSpacer)
+
+		self.appendChild(self.table)
+
+		if self._virtual:
+			self.bottomSpacer = html5.Div()
+			self.bottomSpacer["class"].append("spacer")
+			self.appendChild(self.bottomSpacer)
 
 		self._model = [] # List of values we are displaying right now
+		self._modelIndex = {} # Maps the _uniqeIndex of each model entry to its position in _model
 		self._shownFields = [] # List of keys we display from the model
 		self._modelIdx = 0 # Internal counter to distinguish between 2 rows with identical data
 		self._isAjaxLoading = False # Determines if we already requested the next batch of rows
 		self._dataProvider = None # Which object to call if we need more data
 		self._cellRender = {} # Map of renders for a given field
+		self._plainRender = conf["table.plainRender"] # Use the renderHtml() method of cell renders, if provided
+		self._renderQueue = [] # Rows added to the model, but not rendered yet
+		self._updateLevel = 0 # Nesting level of beginUpdate() calls
+		self._rebuildPending = False # Determines if the table must be rebuilt by endUpdate()
+		self._renderScheduled = False # Determines if rendering the next chunk of rows is already scheduled
 
 		# We re-emit some events with custom parameters
 		self.selectionChangedEvent = EventDispatcher("selectionChanged")
 		self.selectionActivatedEvent = EventDispatcher("selectionActivated")
 		self.tableChangedEvent = EventDispatcher("tableChanged")
+		self.rowsRenderedEvent = EventDispatcher("rowsRendered")
 
 		self.table.selectionChangedEvent.register( self )
 		self.table.selectionActivatedEvent.register( self )
@@ -531,10 +838,76 @@ class DataTable( html5.Div ):
 		self.recalcHeight()
 		self.sinkEvent("onScroll")
 
+		# The next batch is requested as soon as this element gets within
+		# _prefetchRows rows of the viewport.
+		self.sentinel = html5.Div()
+		self.sentinel["class"].append("sentinel")
+		self.appendChild(self.sentinel)
+
+		self._useObserver = bool(eval("window").IntersectionObserver) and not self._loadOnDisplay # Watch the sentinel
+		self._observer = None # IntersectionObserver watching the sentinel while attached
+		self._prefetchRows = conf["table.prefetchRows"] # Distance in rows to the end at which the next batch is requested
+		self._onResize = self.onWindowResize # Same bound method for adding and removing the listener
+
+	def onAttach(self):
+		super(DataTable, self).onAttach()
+		eval("window.top").addEventListener("resize", self._onResize)
+		self._observe()
+
+	def onDetach(self):
+		eval("window.top").removeEventListener("resize", self._onResize)
+		self._unobserve()
+		super(DataTable, self).onDetach()
+
+	def _observe(self):
+		"""
+			Starts watching the sentinel, with a margin of _prefetchRows rows.
+		"""
+		if not self._useObserver or self._observer:
+			return
+
+		callback = self.onSentinelIntersection
+		root = self.element
+		margin = "0px 0px %dpx 0px" % (self._prefetchRows * self._getRowHeight())
+
+		self._observer = JS("new IntersectionObserver(@{{callback}}, {root: @{{root}}, rootMargin: @{{margin}}})")
+		self._observer.observe(self.sentinel.element)
+
+	def _unobserve(self):
+		"""
+			Stops watching the sentinel.
+		"""
+		if self._observer:
+			self._observer.disconnect()
+			self._observer = None
+
+	def setPrefetchRows(self, rows):
+		"""
+			Sets the distance in rows to the end of the table at which the next batch is requested.
+			:type rows: int
+		"""
+		if rows == self._prefetchRows:
+			return
+
+		self._prefetchRows = rows
+
+		# The margin of an observer is fixed, so replace it
+		if self._observer:
+			self._unobserve()
+			self._observe()
 
 	def recalcHeight(self, *args, **kwargs):
 		self["style"]["max-height"] = "%spx" % (int(eval("window.top.innerHeight"))-280)
 
+	def onWindowResize(self, *args, **kwargs):
+		"""
+			Adapts the height, and in virtual mode the rendered rows, to the new window size.
+		"""
+		self.recalcHeight()
+
+		if self._virtual:
+			DeferredCall(self._renderWindow, _queue="frame")
+
 	def setDataProvider(self,obj):
 		"""
 			Register's 'obj' as the provider for this table.
@@ -557,6 +930,17 @@ class DataTable( html5.Div ):
 		"""
 			Ensure the table scrolls according to the position of its cursor
 		"""
+		if self._virtual and row is not None:
+			top = self._getRowTop(row)
+			bottom = top + self._getRowHeight(row)
+
+			if self.element.scrollTop > top:
+				self.element.scrollTop = top
+			elif self.element.scrollTop + self.element.clientHeight < bottom:
+				self.element.scrollTop = bottom - self.element.clientHeight
+
+			return
+
 		tr = table.getTrByIndex( row )
 		if tr is None:
 			return
@@ -582,8 +966,16 @@ class DataTable( html5.Div ):
 		"""
 		obj["_uniqeIndex"] = self._modelIdx
 		self._modelIdx += 1
+		self._modelIndex[ obj["_uniqeIndex"] ] = len(self._model)
 		self._model.append( obj )
-		self._renderObject( obj )
+		self._addRowHeights(1)
+
+		if self._virtual:
+			self.table.setTotalRowCount(len(self._model))
+			self._renderWindow()
+		else:
+			self._renderObject( obj )
+
 		self._isAjaxLoading = False
 		if "is_loading" in self.table["class"]:
 			self.table["class"].remove("is_loading")
@@ -593,29 +985,264 @@ class DataTable( html5.Div ):
 		"""
 			Adds multiple rows at once.
 			Much faster than calling add() multiple times.
+			The rows are rendered in chunks spread over several animation frames,
+			so large batches don't block the user interface.
 		"""
-		self.table.prepareGrid( len(objList), len(self._shownFields) )
 		for obj in objList:
 			obj["_uniqeIndex"] = self._modelIdx
 			self._modelIdx += 1
+			self._modelIndex[ obj["_uniqeIndex"] ] = len(self._model)
 			self._model.append( obj )
-			self._renderObject( obj, tableIsPrepared=True )
-			self._isAjaxLoading = False
-			if "is_loading" in self.table["class"]:
-				self.table["class"].remove("is_loading")
-		self.testIfNextBatchNeededImmediately()
+
+		self._addRowHeights(len(objList))
+
+		self._isAjaxLoading = False
+		if "is_loading" in self.table["class"]:
+			self.table["class"].remove("is_loading")
+
+		if self._virtual:
+			self.table.setTotalRowCount(len(self._model))
+			self._renderWindow()
+			self.testIfNextBatchNeededImmediately()
+			return
+
+		self._renderQueue.extend(objList)
+		self._renderChunk()
+
+	def _getRowHeight(self, row=None):
+		"""
+			Returns the measured height of row in px. For rows not measured yet, or if
+			row is None, the average height of the rows measured so far is returned,
+			or the configured height if there are none.
+		"""
+		if row is not None and self._rowHeights[row] is not None:
+			return self._rowHeights[row]
+
+		if self._measuredRows:
+			return self._measuredHeight / float(self._measuredRows)
+
+		return conf["table.rowHeight"]
+
+	def _setRowHeight(self, row, height):
+		"""
+			Sets the measured height of row in px, or None to forget it.
+		"""
+		if self._rowHeights[row] == height:
+			return
+
+		if self._rowHeights[row] is not None:
+			self._measuredHeight -= self._rowHeights[row]
+			self._measuredRows -= 1
+
+		self._rowHeights[row] = height
+		self._rowOffsets = None
+
+		if height is not None:
+			self._measuredHeight += height
+			self._measuredRows += 1
+
+	def _resetRowHeights(self):
+		"""
+			Forgets all measured row heights, e.g. when the shown fields changed.
+		"""
+		self._rowHeights = [None] * len(self._model)
+		self._measuredHeight = 0
+		self._measuredRows = 0
+		self._rowOffsets = None
+
+	def _addRowHeights(self, count):
+		"""
+			Accounts for count rows appended to the model, which aren't measured yet.
+		"""
+		self._rowHeights.extend([None] * count)
+
+		if self._rowOffsets is not None:
+			estimate = self._getRowHeight()
+
+			for i in range(0, count):
+				self._rowOffsets.append(self._rowOffsets[-1] + estimate)
+
+	def _getRowOffsets(self):
+		"""
+			Returns the offset in px of each row from the top of the first row, followed
+			by the total height of all rows. The offsets are kept until a row height changes.
+		"""
+		if self._rowOffsets is None:
+			estimate = self._getRowHeight()
+			top = 0
+			offsets = [0]
+
+			for height in self._rowHeights:
+				top += estimate if height is None else height
+				offsets.append(top)
+
+			self._rowOffsets = offsets
+
+		return self._rowOffsets
+
+	def _getRowTop(self, row):
+		"""
+			Returns the offset in px of row from the top of the first row.
+		"""
+		return self._getRowOffsets()[row]
+
+	def _getRowAt(self, offset):
+		"""
+			Returns the index of the row at offset px from the top of the first row,
+			and the offset of that row.
+		"""
+		offsets = self._getRowOffsets()
+
+		# Find the first offset below the given one
+		lo = 0
+		hi = len(offsets)
+
+		while lo < hi:
+			mid = int((lo + hi) / 2)
+
+			if offsets[mid] > offset:
+				hi = mid
+			else:
+				lo = mid + 1
+
+		row = min(max(0, lo - 1), len(self._rowHeights))
+		return row, offsets[row]
+
+	def _updateSpacers(self):
+		"""
+			Sizes the spacers to the height of the rows above and below the window.
+		"""
+		first, last = self._window
+		self._windowTop = self._getRowTop(first)
+		self._windowCount = len(self._model)
+
+		self.topSpacer["style"]["height"] = "%dpx" % self._windowTop
+		self.bottomSpacer["style"]["height"] = "%dpx" % (self._getRowTop(self._windowCount) - self._getRowTop(last))
+
+	def _renderWindow(self, *args, **kwargs):
+		"""
+			Ensures the rows in and near the viewport are present in the DOM (virtual mode only).
+			The window is only moved when the viewport leaves the rows present in the DOM,
+			so scrolling re-renders the rows about once every conf["table.overscan"] rows.
+		"""
+		height = self.element.clientHeight or int(self["style"]["max-height"][:-2])
+		scrollTop = self.element.scrollTop
+		count = len(self._model)
+
+		if self._window is not None:
+			first, last = self._window
+			bottom = self._windowTop + self.table.element.offsetHeight - self.table.head.element.offsetHeight
+
+			if ((first == 0 or self._windowTop <= scrollTop)
+				and (last == count or bottom >= scrollTop + height)):
+
+				if count != self._windowCount:
+					self._updateSpacers()
+
+				return
+
+		visibleFirst, visibleTop = self._getRowAt(scrollTop)
+		visibleLast = min(count, self._getRowAt(scrollTop + height)[0] + 1)
+
+		first = max(0, visibleFirst - conf["table.overscan"])
+		last = min(count, visibleLast + conf["table.overscan"])
+		self._window = (first, last)
+
+		self.table.setRowOffset(first)
+
+		if self._shownFields and last > first:
+			start = time.time()
+
+			self.table.prepareGrid(last - first, self._gridCols())
+			for obj in self._model[first:last]:
+				self._renderObject(obj, tableIsPrepared=True)
+
+			self.rowsRenderedEvent.fire(self, last - first, (time.time() - start) * 1000)
+
+		self.table.refreshRows(first, last)
+
+		for row in range(first, last):
+			tr = self.table.getTrByIndex(row)
+			if tr is not None and tr.element.offsetHeight:
+				self._setRowHeight(row, tr.element.offsetHeight)
+
+		self._updateSpacers()
+
+		# Keep the first visible row in place, if its estimated offset was wrong
+		if visibleFirst < count:
+			delta = self._getRowTop(visibleFirst) - visibleTop
+			if delta:
+				self.element.scrollTop = scrollTop + delta
+
+	def _scheduleRenderChunk(self):
+		"""
+			Schedules rendering the next chunk of queued rows for the next animation frame.
+		"""
+		if self._renderScheduled:
+			return
+
+		self._renderScheduled = True
+
+		DeferredCall(self._renderChunk, _queue="frame")
+
+	def _renderChunk(self, *args, **kwargs):
+		"""
+			Renders queued rows until the time budget of conf["table.renderBudget"]
+			milliseconds is used up, and schedules the rest for the next frame.
+		"""
+		self._renderScheduled = False
+
+		if not self._renderQueue:
+			return
+
+		start = time.time()
+		budget = conf["table.renderBudget"] / 1000.0
+		rows = 0
+
+		while self._renderQueue:
+			chunk = self._renderQueue[:conf["table.renderChunkSize"]]
+			self._renderQueue = self._renderQueue[len(chunk):]
+
+			self.table.prepareGrid( len(chunk), self._gridCols() )
+			for obj in chunk:
+				self._renderObject( obj, tableIsPrepared=True )
+
+			rows += len(chunk)
+
+			if time.time() - start >= budget:
+				break
+
+		if self._shownFields:
+			self.rowsRenderedEvent.fire(self, rows, (time.time() - start) * 1000)
+
+		if self._renderQueue:
+			self._scheduleRenderChunk()
+		else:
+			self.testIfNextBatchNeededImmediately()
 
 	def testIfNextBatchNeededImmediately(self):
 		"""
 			Test if we display enough entries so that our contents are scrollable.
 			Otherwise, we'll never request a second batch
 		"""
+		if self._useObserver:
+			# Observing again reports the current state of the sentinel; while
+			# detached, this happens once attached again.
+			if self._observer:
+				self._observer.unobserve(self.sentinel.element)
+				self._observer.observe(self.sentinel.element)
+
+			return
 
 		sumHeight = 0
-		for c in self.table._children:
-			if "clientHeight" in dir(c.element):
-				sumHeight += c.element.clientHeight
-		if not sumHeight:  # We'll get no height if not visible, so we'll append our self to the body for a moment
+		if self._virtual:
+			sumHeight = self._getRowTop(len(self._model))
+		else:
+			for c in self.table._children:
+				if "clientHeight" in dir(c.element):
+					sumHeight += c.element.clientHeight
+
+		if not sumHeight and not self._virtual:  # We'll get no height if not visible, so we'll append our self to the body for a moment
 			parent = self.parent()
 			parent.removeChild(self)
 			html5.Body().appendChild(self)
@@ -623,15 +1250,29 @@ class DataTable( html5.Div ):
 			html5.Body().removeChild(self)
 			parent.appendChild(self)
 
-		if (not self._isAjaxLoading
-			and (self._loadOnDisplay
-		            or not sumHeight > int(self["style"]["max-height"][:-2]))):
+		if self._loadOnDisplay or not sumHeight > int(self["style"]["max-height"][:-2]):
+			self.requestNextBatch()
+
+	def onSentinelIntersection(self, entries, *args, **kwargs):
+		"""
+			Internal callback of the IntersectionObserver; requests the next batch
+			when the end of the table gets near the viewport.
+		"""
+		if JS("@{{entries}}[@{{entries}}.length - 1].isIntersecting"):
+			self.requestNextBatch()
+
+	def requestNextBatch(self):
+		"""
+			Asks the dataProvider for the next batch of rows, unless already done.
+		"""
+		if self._isAjaxLoading or not self._dataProvider:
+			return
+
+		self._isAjaxLoading = True
+		if not "is_loading" in self.table["class"]:
+			self.table["class"].append("is_loading")
 
-			if self._dataProvider:
-				self._isAjaxLoading = True
-				if not "is_loading" in self.table["class"]:
-					self.table["class"].append("is_loading")
-				self._dataProvider.onNextBatchNeeded()
+		self._dataProvider.onNextBatchNeeded()
 
 	def remove(self, objOrIndex):
 		"""
@@ -640,12 +1281,25 @@ class DataTable( html5.Div ):
 			It _cannot_ be any original object passed to 'add' - it _must_ be recived by an eventListener!
 		"""
 		if isinstance( objOrIndex, dict ):
-			assert objOrIndex in self._model, "Cannot remove unknown object from Table"
-			objOrIndex = self._model.index( objOrIndex )
+			assert objOrIndex.get("_uniqeIndex") in self._modelIndex.keys(), "Cannot remove unknown object from Table"
+			objOrIndex = self._modelIndex[ objOrIndex["_uniqeIndex"] ]
 		if isinstance( objOrIndex, int ):
 			assert objOrIndex>0 and objOrIndex<len(self._model), "Modelindex out of range"
-			self._model.remove( self._model[objOrIndex] )
+			del self._modelIndex[ self._model[objOrIndex]["_uniqeIndex"] ]
+			self._model.pop( objOrIndex )
+			self._setRowHeight( objOrIndex, None )
+			self._rowHeights.pop( objOrIndex )
+			self._rowOffsets = None
+
+			for idx in range( objOrIndex, len(self._model) ):
+				self._modelIndex[ self._model[idx]["_uniqeIndex"] ] = idx
+
 			self.table.removeRow( objOrIndex )
+
+			if self._virtual:
+				self.table.setTotalRowCount(len(self._model))
+				self._window = None
+				self._renderWindow()
 		else:
 			raise TypeError("Expected int or dict, got %s" % str(type(objOrIndex)))
 
@@ -653,9 +1307,21 @@ class DataTable( html5.Div ):
 		"""
 			Flushes the whole table.
 		"""
-		self.table.clear()
+		self._renderQueue = []
+
 		if not keepModel:
 			self._model = []
+			self._modelIndex = {}
+
+		self._resetRowHeights()
+
+		if self._virtual:
+			self._window = None
+			self.table.setTotalRowCount(len(self._model))
+			self.topSpacer["style"]["height"] = "0px"
+			self.bottomSpacer["style"]["height"] = "0px"
+
+		self.table.clear()
 
 	def _renderObject(self, obj, tableIsPrepared=False):
 		"""
@@ -667,9 +1333,13 @@ class DataTable( html5.Div ):
 		if not self._shownFields:
 			return
 
-		rowIdx = self._model.index(obj)
+		rowIdx = self._modelIndex[ obj["_uniqeIndex"] ]
 		cellIdx = 0
 
+		if self._plainRender:
+			self._renderObjectPlain( obj, rowIdx )
+			return
+
 		if not tableIsPrepared:
 			self.table.prepareCol( rowIdx, len( self._shownFields ) - 1 )
 
@@ -684,16 +1354,84 @@ class DataTable( html5.Div ):
 			self.table.setCell( rowIdx, cellIdx, lbl )
 			cellIdx += 1
 
+	def _gridCols(self):
+		"""
+			Returns the number of cells prepareGrid() has to create per row.
+			In plain render mode, the cells are created while rendering the row.
+		"""
+		if self._plainRender:
+			return 0
+
+		return len(self._shownFields)
+
+	def _renderObjectPlain(self, obj, rowIdx):
+		"""
+			Renders the object into the table, writing the cells as HTML where possible.
+			Cell renders of a class allowed by bones.base.allowHtmlRender() return a HTML
+			string for a cell by renderHtml(), or None if the cell requires a widget
+			(e.g. for interaction).
+		"""
+		cells = []
+
+		for field in self._shownFields:
+			render = self._cellRender.get( field )
+			cell = None
+
+			if render is not None:
+				if getattr( render, "htmlRenderClass", None ) is render.__class__:
+					cell = render.renderHtml( obj, field )
+
+				if cell is None:
+					cell = render.render( obj, field )
+
+			elif field in obj.keys():
+				cell = "<label>%s</label>" % utils.escapeHtml( obj[field] )
+			else:
+				cell = "<label>...</label>"
+
+			cells.append( cell )
+
+		self.table.setRowCells( rowIdx, cells )
+
 	def rebuildTable(self):
 		"""
 			Rebuilds the entire table.
 			Useful if something fundamental changed (ie. the cell renderer or the list of visible fields)
+			Between beginUpdate() and endUpdate(), the rebuild is deferred to endUpdate().
 		"""
+		if self._updateLevel:
+			self._rebuildPending = True
+			return
+
 		self.clear( keepModel=True )
-		self.table.prepareGrid( len(self._model), len(self._shownFields))
+
+		if self._virtual:
+			self._renderWindow()
+			return
+
+		self.table.prepareGrid( len(self._model), self._gridCols() )
 		for obj in self._model:
 			self._renderObject( obj, tableIsPrepared=True )
 
+	def beginUpdate(self):
+		"""
+			Starts changing the configuration of the table (shown fields, cell renders).
+			The table is rebuilt at most once, by the matching endUpdate().
+		"""
+		self._updateLevel += 1
+
+	def endUpdate(self):
+		"""
+			Finishes changing the configuration of the table started by beginUpdate(),
+			and rebuilds the table if required.
+		"""
+		assert self._updateLevel > 0, "endUpdate() called without beginUpdate()"
+		self._updateLevel -= 1
+
+		if not self._updateLevel and self._rebuildPending:
+			self._rebuildPending = False
+			self.rebuildTable()
+
 	def setShownFields(self,fields):
 		"""
 			Sets the list of _shownFields.
@@ -712,19 +1450,14 @@ class DataTable( html5.Div ):
 		if self._loadOnDisplay:
 			return
 
-		self.recalcHeight()
-
-		if ( ( self.element.scrollTop + self.element.clientHeight )
-			     >= self.element.scrollHeight
-		     and not self._isAjaxLoading ):
+		if self._virtual:
+			DeferredCall(self._renderWindow, _queue="frame")
 
-			if self._dataProvider:
-
-				self._isAjaxLoading = True
-				if not "is_loading" in self.table["class"]:
-					self.table["class"].append("is_loading")
+		if self._useObserver:
+			return
 
-				self._dataProvider.onNextBatchNeeded()
+		if ( self.element.scrollTop + self.element.clientHeight ) >= self.element.scrollHeight:
+			self.requestNextBatch()
 
 	def onSelectionChanged( self, table, rows ):
 		"""
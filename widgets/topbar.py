@@ -131,7 +131,7 @@ class Tasks(html5.Li):
 		if not conf[ "tasks" ][ "server" ]:
 			NetworkService.request( None, "/vi/_tasks/list",
 		        successHandler=self.onTaskListAvailable,
-		        cacheable=False )
+		        cacheable=False, priority=NetworkService.PRIORITY_BACKGROUND )
 
 		self.update()
 
@@ -345,7 +345,12 @@ class TreeWidget(html5.Div):
 
 	def onAttach(self):
 		super(TreeWidget, self).onAttach()
-		NetworkService.registerChangeListener(self)
+		NetworkService.registerChangeListener(self, module=self.module)
+
+		# Also listen to the modules providing our root nodes
+		for k, v in conf["modules"].items():
+			if v.get("handler") == "list" and v.get("rootNodeOf") == self.module:
+				NetworkService.registerChangeListener(self, module=k)
 
 	def onDetach(self):
 		super(TreeWidget, self).onDetach()
@@ -452,6 +457,10 @@ class TreeWidget(html5.Div):
 	def reloadData(self, paramsOverride=None):
 		assert self.node is not None, "reloadData called while self.node is None"
 		self.entryFrame.clear()
+
+		for req in self._currentRequests:
+			req.abort()
+
 		self._currentRequests = []
 		if paramsOverride:
 			params = paramsOverride.copy()
@@ -461,12 +470,14 @@ class TreeWidget(html5.Div):
 		if "amount" not in params:
 			params["amount"] = self._batchSize
 
-		r = NetworkService.request(self.module, "list/node", params,
+		r = NetworkService.request(self.module, "list/node",
+		                           NetworkService.structures.prepare(self.module, "node", params.copy()),
 								   successHandler=self.onRequestSucceded,
 								   failureHandler=self.showErrorMsg)
 		r.reqType = "node"
 		self._currentRequests.append(r)
-		r = NetworkService.request(self.module, "list/leaf", params,
+		r = NetworkService.request(self.module, "list/leaf",
+		                           NetworkService.structures.prepare(self.module, "leaf", params.copy()),
 								   successHandler=self.onRequestSucceded,
 								   failureHandler=self.showErrorMsg)
 		r.reqType = "leaf"
@@ -482,12 +493,23 @@ class TreeWidget(html5.Div):
 
 		self._currentRequests.remove(req)
 		data = NetworkService.decode(req)
+		structure = NetworkService.structures.resolve(self.module, req.reqType, data)
+
+		params = NetworkService.structures.refetchParams(structure, req.params)
+		if params:
+			# The structure was left out, but has been dropped meanwhile (e.g. by a new login)
+			r = NetworkService.request(self.module, "list/%s" % req.reqType, params,
+									   successHandler=self.onRequestSucceded,
+									   failureHandler=self.showErrorMsg)
+			r.reqType = req.reqType
+			self._currentRequests.append(r)
+			return
 
 		for skel in data["skellist"]:
 			if req.reqType == "node":
-				n = self.nodeWidget(self.module, skel, data["structure"])
+				n = self.nodeWidget(self.module, skel, structure)
 			else:
-				n = self.leafWidget(self.module, skel, data["structure"])
+				n = self.leafWidget(self.module, skel, structure)
 
 			self.entryFrame.appendChild(n)
 
@@ -497,6 +519,7 @@ class TreeWidget(html5.Div):
 			self._currentCursor[req.reqType] = data["cursor"]
 
 			req.params["cursor"] = data["cursor"]
+			NetworkService.structures.prepare(self.module, req.reqType, req.params)
 			r = NetworkService.request(self.module, "list/%s" % req.reqType, req.params,
 									   successHandler=self.onRequestSucceded,
 									   failureHandler=self.showErrorMsg)
@@ -65,7 +65,7 @@ class UserLogoutMsg(html5.ext.Popup):
 		NetworkService.request("user", "view/self",
 		                       successHandler=self.onUserTestSuccess,
 		                       failureHandler=self.onUserTestFail,
-		                       cacheable=False)
+		                       cacheable=False, priority=NetworkService.PRIORITY_BACKGROUND)
 
 	def onUserTestSuccess(self, req):
 		"""